@@ -4,29 +4,91 @@ import numpy as np
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
 import matplotlib.animation as animation
-from collections import deque # Fila para armazenar histórico de ângulos
 import time
 import math
 
+# Pacote da IMU: 6 floats (ax, ay, az, gx, gy, gz) + marcador uint32
+PACKET_SIZE = 28
+PACKET_MARKER = 0xFFFFFFFE
+
+# Numba (opcional): compila o laço de ângulos + Kalman; sem ele usa-se a versão numpy abaixo
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+def _angles_loop(accel, estimate, error, process_variance, measurement_variance, out):
+    """Ângulos brutos e filtrados de N amostras (N, 3); estado do Kalman atualizado in-place"""
+    n = 0
+    for i in range(accel.shape[0]):
+        ax, ay, az = accel[i, 0], accel[i, 1], accel[i, 2]
+        if ax == 0.0 and ay == 0.0 and az == 0.0:
+            continue  # Amostra inválida
+        
+        # Pitch = asin(ax/|a|) = atan2(ax, hypot(ay, az)); roll = atan2(ay, az) no intervalo [-180, 180]
+        raw_pitch = math.degrees(math.atan2(ax, math.hypot(ay, az)))
+        raw_roll = math.degrees(math.atan2(ay, az))
+        
+        # Kalman de pitch (0) e roll (1)
+        priori_error = error[0] + process_variance
+        blending = priori_error / (priori_error + measurement_variance)
+        estimate[0] += blending * (raw_pitch - estimate[0])
+        error[0] = (1 - blending) * priori_error
+        
+        priori_error = error[1] + process_variance
+        blending = priori_error / (priori_error + measurement_variance)
+        estimate[1] += blending * (raw_roll - estimate[1])
+        error[1] = (1 - blending) * priori_error
+        
+        out[n, 0] = estimate[0]
+        out[n, 1] = estimate[1]
+        out[n, 2] = raw_pitch
+        out[n, 3] = raw_roll
+        n += 1
+    return n
+
+# Abaixo disso o custo fixo das chamadas numpy (~20 µs) supera o laço escalar (~2 µs por amostra)
+_NUMPY_MIN_BATCH = 16
+
+def _angles_numpy(accel, estimate, error, process_variance, measurement_variance, out):
+    """Mesmo contrato de _angles_loop sem numba: ângulos vetorizados, só o Kalman em laço de floats"""
+    if len(accel) < _NUMPY_MIN_BATCH:
+        return _angles_loop(accel, estimate, error, process_variance, measurement_variance, out)
+    
+    accel = accel[np.any(accel != 0.0, axis=1)]  # Descarta amostras inválidas
+    n = len(accel)
+    if n == 0:
+        return 0
+    
+    ax, ay, az = accel[:, 0], accel[:, 1], accel[:, 2]
+    out[:n, 2] = np.degrees(np.arctan2(ax, np.hypot(ay, az)))
+    out[:n, 3] = np.degrees(np.arctan2(ay, az))
+    
+    # Kalman de pitch (0) e roll (1): recursão sequencial sobre floats Python (sem escalares numpy)
+    for axis in (0, 1):
+        est = float(estimate[axis])
+        err = float(error[axis])
+        filtered = out[:n, 2 + axis].tolist()
+        for i, measurement in enumerate(filtered):
+            priori_error = err + process_variance
+            blending = priori_error / (priori_error + measurement_variance)
+            est += blending * (measurement - est)
+            err = (1 - blending) * priori_error
+            filtered[i] = est
+        out[:n, axis] = filtered
+        estimate[axis] = est
+        error[axis] = err
+    return n
+
+_angles_batch = _angles_numpy if njit is None else njit(cache=True, fastmath=True)(_angles_loop)
+
 class KalmanFilter:
-    """Filtro de Kalman simples para ângulos"""
-    def __init__(self, process_variance=1e-3, measurement_variance=1e-1):
+    """Estado do filtro de Kalman para ângulos (um por eixo); o passo do filtro roda em _angles_batch"""
+    def __init__(self, process_variance=1e-3, measurement_variance=1e-1, axes=1):
         self.process_variance = process_variance
         self.measurement_variance = measurement_variance
-        self.posteri_estimate = 0.0
-        self.posteri_error_estimate = 1.0
-        
-    def update(self, measurement):
-        # Predição
-        priori_estimate = self.posteri_estimate
-        priori_error_estimate = self.posteri_error_estimate + self.process_variance
-        
-        # Atualização
-        blending_factor = priori_error_estimate / (priori_error_estimate + self.measurement_variance) # Fator de mistura
-        self.posteri_estimate = priori_estimate + blending_factor * (measurement - priori_estimate)
-        self.posteri_error_estimate = (1 - blending_factor) * priori_error_estimate
-        
-        return self.posteri_estimate
+        self.posteri_estimate = np.zeros(axes)
+        self.posteri_error_estimate = np.ones(axes)
 
 class IMUProcessor:
     def __init__(self, port='COM5', baudrate=1000000):
@@ -34,15 +96,15 @@ class IMUProcessor:
         self.baudrate = baudrate
         self.serial_conn = None
         
-        # Filtros Kalman para pitch e roll
-        self.pitch_filter = KalmanFilter(process_variance=1e-3, measurement_variance=5e-2)
-        self.roll_filter = KalmanFilter(process_variance=1e-3, measurement_variance=5e-2)
+        # Filtro Kalman para pitch e roll (os dois eixos num único update)
+        self.angle_filter = KalmanFilter(process_variance=1e-3, measurement_variance=5e-2, axes=2)
         
-        # Histórico de dados para análise
-        self.pitch_history = deque(maxlen=500)
-        self.roll_history = deque(maxlen=500)
-        self.raw_pitch_history = deque(maxlen=500)
-        self.raw_roll_history = deque(maxlen=500)
+        # Histórico de dados para análise (buffer circular: colunas pitch, roll filtrados,
+        # pitch, roll brutos)
+        self.history_size = 500
+        self._hist = np.zeros((self.history_size, 4), np.float32)
+        self._hist_idx = 0   # Próxima posição de escrita
+        self._hist_len = 0   # Amostras válidas
         
         # Dados atuais
         self.current_pitch = 0.0
@@ -51,9 +113,32 @@ class IMUProcessor:
         self.current_raw_roll = 0.0
         
         # Dados brutos da IMU
-        self.ax, self.ay, self.az = 0.0, 0.0, 0.0
-        self.gx, self.gy, self.gz = 0.0, 0.0, 0.0
-        
+        self._accel = np.zeros(3)
+        self._gyro = np.zeros(3)
+        
+        # Buffer de recepção serial (até 128 pacotes por leitura) e bytes pendentes nele
+        self._rx = bytearray(PACKET_SIZE * 128)
+        self._rx_len = 0
+        self.stuck_count = 0
+        
+        # Matriz de rotação reutilizada a cada frame
+        self._R = np.empty((3, 3))
+        
+    # Componentes individuais (leitura) dos vetores da IMU
+    ax = property(lambda self: self._accel[0])
+    ay = property(lambda self: self._accel[1])
+    az = property(lambda self: self._accel[2])
+    gx = property(lambda self: self._gyro[0])
+    gy = property(lambda self: self._gyro[1])
+    gz = property(lambda self: self._gyro[2])
+    
+    @property
+    def ordered_history(self):
+        """Histórico em ordem cronológica (mais antigo primeiro), shape (n, 4)"""
+        if self._hist_len < self.history_size:
+            return self._hist[:self._hist_len]
+        return np.concatenate((self._hist[self._hist_idx:], self._hist[:self._hist_idx]))
+    
     def connect(self):
         """Conecta à porta serial"""
         try:
@@ -72,153 +157,153 @@ class IMUProcessor:
             print("Desconectado da porta serial")
     
     def read_imu_packet(self):
-        """Lê um pacote completo da IMU"""
+        """Lê os pacotes disponíveis da IMU (ax..gz ficam com o mais recente)"""
+        if not self.serial_conn or not self.serial_conn.is_open:
+            return None
+        return self.read_imu_batch() is not None
+    
+    def read_imu_batch(self):
+        """Lê de uma vez todos os pacotes completos disponíveis; retorna array (N, 6) ou None"""
         if not self.serial_conn or not self.serial_conn.is_open:
             return None
         
         try:
-            # Limpa o buffer se estiver muito cheio
-            if self.serial_conn.in_waiting > 280:  # ~10 pacotes
-                self.serial_conn.reset_input_buffer()
-                
+            # Uma leitura com tudo que já chegou (no mínimo o restante de um pacote)
+            space = len(self._rx) - self._rx_len
+            wanted = max(min(self.serial_conn.in_waiting, space), PACKET_SIZE - self._rx_len)
+            data = self.serial_conn.read(wanted)
+            self._rx[self._rx_len:self._rx_len + len(data)] = data
+            self._rx_len += len(data)
             
-            # Lê um pacote completo (28 bytes: 6 floats + 1 uint32)
-            data = self.serial_conn.read(28)
+            count = self._rx_len // PACKET_SIZE
+            if count == 0:
+                return None
             
-            if len(data) == 28:
-                # Desempacota os dados
-                unpacked = struct.unpack('<6f1I', data)  # Little-endian
-                
-                # Verifica marcador
-                if unpacked[6] == 0xFFFFFFFE:
-                    old_ax, old_ay, old_az = self.ax, self.ay, self.az
-                    self.ax, self.ay, self.az = unpacked[0], unpacked[1], unpacked[2]
-                    self.gx, self.gy, self.gz = unpacked[3], unpacked[4], unpacked[5]
-                    
-                    # Detecta se os dados estão "travados"
-                    if abs(old_ax - self.ax) < 0.001 and abs(old_ay - self.ay) < 0.001 and abs(old_az - self.az) < 0.001:
-                        self.stuck_count = getattr(self, 'stuck_count', 0) + 1
-                        if self.stuck_count > 50:  # ~0.5 segundos
-                            print(f"\n  AVISO: Dados parecem travados há {self.stuck_count} leituras!")
-                            print(f"   Aceleração fixa em: ({self.ax:.3f}, {self.ay:.3f}, {self.az:.3f})")
-                            self.stuck_count = 0
-                    else:
-                        self.stuck_count = 0
-                    
-                    return True
-                else:
-                    print(f"Marcador inválido: {hex(unpacked[6])}")
-                    # Tenta ressincronizar procurando pelo marcador
-                    self.resync_serial()
+            # Pacotes de 28 bytes (6 floats + 1 uint32), little-endian: visão (N, 7) do buffer
+            words = np.frombuffer(self._rx, dtype='<u4', count=count * 7).reshape(count, 7)
+            valid = words[:, 6] == PACKET_MARKER
+            good = count if valid.all() else int(np.argmin(valid))
+            samples = np.frombuffer(self._rx, dtype='<f4', count=good * 7).reshape(good, 7)[:, :6].copy()
+            
+            if good < count:
+                print(f"Marcador inválido: {hex(words[good, 6])}")
+                # Tenta ressincronizar procurando pelo marcador (a partir do pacote inválido)
+                pending = bytes(self._rx[good * PACKET_SIZE:self._rx_len])
+                self._rx_len = 0
+                self.resync_serial(pending)
+            else:
+                # Mantém o pacote incompleto no início do buffer
+                leftover = self._rx_len - count * PACKET_SIZE
+                self._rx[:leftover] = self._rx[count * PACKET_SIZE:self._rx_len]
+                self._rx_len = leftover
+            
+            if good == 0:
+                return None
+            
+            # Detecta se os dados estão "travados" (aceleração sem variar entre pacotes consecutivos)
+            accel = samples[:, :3]
+            moved = np.any(np.abs(np.diff(accel, axis=0, prepend=self._accel[np.newaxis])) >= 0.001, axis=1)
+            if moved.any():
+                self.stuck_count = good - 1 - np.flatnonzero(moved)[-1]
+            else:
+                self.stuck_count += good
+            
+            self._accel[:] = accel[-1]
+            self._gyro[:] = samples[-1, 3:]
+            
+            if self.stuck_count > 50:  # ~0.5 segundos
+                print(f"\n  AVISO: Dados parecem travados há {self.stuck_count} leituras!")
+                print(f"   Aceleração fixa em: ({self.ax:.3f}, {self.ay:.3f}, {self.az:.3f})")
+                print("   Tente mover o Arduino ou verificar a conexão")
+                self.stuck_count = 0
+            
+            return samples
                     
         except Exception as e:
             print(f"Erro na leitura: {e}")
             
-        return False
+        return None
     
-    def resync_serial(self):
+    def resync_serial(self, pending=b''):
         """Tenta ressincronizar a comunicação serial"""
         print("Tentando ressincronizar...")
-        marker_bytes = struct.pack('<I', 0xFFFFFFFE)
+        marker_bytes = struct.pack('<I', PACKET_MARKER)
         
-        # Lê até encontrar o marcador
-        buffer = b''
+        # Procura o marcador nos bytes pendentes e depois em blocos lidos da serial
+        buffer = bytes(pending)
         timeout_start = time.time()
         
-        while time.time() - timeout_start < 2:  # Timeout de 2 segundos
-            byte = self.serial_conn.read(1)
-            if byte:
-                buffer += byte
-                if len(buffer) > 4:
-                    buffer = buffer[-4:]  # Mantém apenas os últimos 4 bytes
-                
-                if buffer == marker_bytes:
-                    print("Ressincronizado com sucesso!")
-                    return True
+        while True:
+            idx = buffer.find(marker_bytes)
+            if idx >= 0:
+                # O que vem depois do marcador começa um pacote: fica no buffer de recepção
+                # (descartando pacotes inteiros do início se não couber)
+                rest = buffer[idx + 4:]
+                excess = len(rest) - len(self._rx)
+                if excess > 0:
+                    rest = rest[-(-excess // PACKET_SIZE) * PACKET_SIZE:]
+                self._rx[:len(rest)] = rest
+                self._rx_len = len(rest)
+                print("Ressincronizado com sucesso!")
+                return True
+            
+            if time.time() - timeout_start >= 2:  # Timeout de 2 segundos
+                break
+            
+            # Mantém os 3 últimos bytes: o marcador pode estar dividido entre dois blocos
+            buffer = buffer[-3:] + self.serial_conn.read(max(1, min(self.serial_conn.in_waiting, 4096)))
         
         print("Falha na ressincronização")
         return False
     
     def calculate_angles(self):
         """Calcula pitch e roll a partir dos dados do acelerômetro"""
-        
-        # Normaliza os valores do acelerômetro
-        magnitude = math.sqrt(self.ax**2 + self.ay**2 + self.az**2)
-        if magnitude == 0:
-            return self.current_pitch, self.current_roll
-        
-        ax_norm = self.ax / magnitude
-        ay_norm = self.ay / magnitude
-        az_norm = self.az / magnitude
-        
-        # Cálculo mais robusto do pitch
-        # Limita ax_norm para evitar erros de domínio no asin
-        ax_clamped = max(-1.0, min(1.0, ax_norm))
-        raw_pitch = math.degrees(math.asin(ax_clamped))
-        
-        # Cálculo mais robusto do roll
-        # Evita divisão por zero e trata o caso quando az é negativo
-        if abs(az_norm) < 0.001:  # Evita divisão por zero quando az ≈ 0
-            # Quando az ≈ 0, use apenas ay para determinar o roll
-            if ay_norm > 0:
-                raw_roll = 90.0
-            else:
-                raw_roll = -90.0
-        else:
-            raw_roll = math.degrees(math.atan2(ay_norm, abs(az_norm)))
-            
-            # Ajusta o sinal do roll baseado na orientação de az
-            if az_norm < 0:  # Arduino está invertido
-                if ay_norm >= 0:
-                    raw_roll = 180.0 - raw_roll
-                else:
-                    raw_roll = -180.0 - raw_roll
+        return self.process_batch(self._accel[np.newaxis])
     
-        # Mantém roll no intervalo [-180, 180]
-        while raw_roll > 180:
-            raw_roll -= 360
-        while raw_roll < -180:
-            raw_roll += 360
-    
-        # Aplica filtro Kalman
-        filtered_pitch = self.pitch_filter.update(raw_pitch)
-        filtered_roll = self.roll_filter.update(raw_roll)
+    def process_batch(self, accel):
+        """Calcula pitch e roll para um lote de amostras do acelerômetro (N, 3)"""
+        results = np.empty((len(accel), 4))
+        kf = self.angle_filter
+        n = _angles_batch(accel, kf.posteri_estimate, kf.posteri_error_estimate,
+                          kf.process_variance, kf.measurement_variance, results)
+        if n == 0:
+            return self.current_pitch, self.current_roll
+        results = results[max(0, n - self.history_size):n]
         
         # Atualiza valores atuais
+        filtered_pitch, filtered_roll, raw_pitch, raw_roll = results[-1]
         self.current_raw_pitch = raw_pitch
         self.current_raw_roll = raw_roll
         self.current_pitch = filtered_pitch
         self.current_roll = filtered_roll
         
         # Adiciona ao histórico
-        self.pitch_history.append(filtered_pitch)
-        self.roll_history.append(filtered_roll)
-        self.raw_pitch_history.append(raw_pitch)
-        self.raw_roll_history.append(raw_roll)
+        idx = (self._hist_idx + np.arange(len(results))) % self.history_size
+        self._hist[idx] = results
+        self._hist_idx = (self._hist_idx + len(results)) % self.history_size
+        self._hist_len = min(self._hist_len + len(results), self.history_size)
         
         return filtered_pitch, filtered_roll
     
     def get_rotation_matrix(self, pitch, roll, yaw=0):
-        """Calcula matriz de rotação 3D"""
-        # Converte graus para radianos
-        p = math.radians(pitch)
-        r = math.radians(roll)
-        y = math.radians(yaw)
-        
-        # Matrizes de rotação
-        Rx = np.array([[1, 0, 0],
-                       [0, math.cos(r), -math.sin(r)],
-                       [0, math.sin(r), math.cos(r)]])
-        
-        Ry = np.array([[math.cos(p), 0, math.sin(p)],
-                       [0, 1, 0],
-                       [-math.sin(p), 0, math.cos(p)]])
-        
-        Rz = np.array([[math.cos(y), -math.sin(y), 0],
-                       [math.sin(y), math.cos(y), 0],
-                       [0, 0, 1]])
-        
-        return Rz @ Ry @ Rx
+        """Calcula matriz de rotação 3D (Rz @ Ry @ Rx, escrita em self._R)"""
+        # Converte graus para radianos; seno e cosseno dos três ângulos de uma vez
+        angles = np.radians((roll, pitch, yaw))
+        sr, sp, sy = np.sin(angles)
+        cr, cp, cy = np.cos(angles)
+        
+        # Produto Rz @ Ry @ Rx em forma fechada
+        R = self._R
+        R[0, 0] = cy * cp
+        R[0, 1] = cy * sp * sr - sy * cr
+        R[0, 2] = cy * sp * cr + sy * sr
+        R[1, 0] = sy * cp
+        R[1, 1] = sy * sp * sr + cy * cr
+        R[1, 2] = sy * sp * cr - cy * sr
+        R[2, 0] = -sp
+        R[2, 1] = cp * sr
+        R[2, 2] = cp * cr
+        return R
 
 class IMUVisualizer:
     def __init__(self, processor):
@@ -231,12 +316,18 @@ class IMUVisualizer:
         self.ax_roll = self.fig.add_subplot(223)
         self.ax_raw = self.fig.add_subplot(224)
         
+        # Vértices de um prisma retangular (Arduino)
+        self.create_arduino_shape()
+        
         # Configuração da visualização 3D
         self.setup_3d_plot()
         self.setup_2d_plots()
+        self.fig.tight_layout()
         
-        # Vértices de um prisma retangular (Arduino)
-        self.create_arduino_shape()
+        # Blitting: fundo estático (eixos, grades, legendas) em cache, só os artistas
+        # animados são redesenhados; o cache é refeito a cada redesenho completo
+        self._bg = None
+        self.fig.canvas.mpl_connect('draw_event', self.on_draw)
         
     def setup_3d_plot(self):
         """Configura o gráfico 3D"""
@@ -248,19 +339,53 @@ class IMUVisualizer:
         self.ax_3d.set_zlabel('Z')
         self.ax_3d.set_title('Orientação Arduino (Pitch & Roll)')
         
+        # Arestas do prisma (uma linha fechada por face) e texto com os ângulos atuais
+        colors = ['red', 'blue', 'green', 'yellow', 'orange', 'purple']
+        self._edge_lines = [
+            self.ax_3d.plot([], [], [], color=colors[i % len(colors)], linewidth=2, animated=True)[0]
+            for i in range(len(self.faces))
+        ]
+        self._angle_text = self.ax_3d.text2D(0.05, 0.95, '', transform=self.ax_3d.transAxes,
+                                             fontsize=12, weight='bold', va='top', animated=True)
+        
     def setup_2d_plots(self):
         """Configura os gráficos 2D"""
-        self.ax_pitch.set_title('Pitch (°)')
+        history_size = self.processor.history_size
+        
+        # Títulos com o valor atual: animados, redesenhados a cada frame junto com as linhas
+        self.ax_pitch.set_title('Pitch: 0.0°', animated=True)
+        self.ax_pitch.set_xlim([0, history_size])
         self.ax_pitch.set_ylim([-90, 90])
         self.ax_pitch.grid(True)
+        self._pitch_line, = self.ax_pitch.plot([], [], 'b-', label='Filtrado', linewidth=2, animated=True)
+        self._raw_pitch_line, = self.ax_pitch.plot([], [], 'r-', alpha=0.5, label='Bruto', animated=True)
+        self.ax_pitch.legend()
         
-        self.ax_roll.set_title('Roll (°)')
+        self.ax_roll.set_title('Roll: 0.0°', animated=True)
+        self.ax_roll.set_xlim([0, history_size])
         self.ax_roll.set_ylim([-180, 180])
         self.ax_roll.grid(True)
-        
-        self.ax_raw.set_title('Dados Brutos vs Filtrados')
+        self._roll_line, = self.ax_roll.plot([], [], 'g-', label='Filtrado', linewidth=2, animated=True)
+        self._raw_roll_line, = self.ax_roll.plot([], [], 'r-', alpha=0.5, label='Bruto', animated=True)
+        self.ax_roll.legend()
+        
+        # Comparação Raw vs Filtrado (últimos 100 pontos)
+        self.recent_size = 100
+        self.ax_raw.set_title('Comparação: Dados Brutos vs Filtrados')
+        self.ax_raw.set_xlim([0, self.recent_size])
         self.ax_raw.set_ylim([-90, 90])
         self.ax_raw.grid(True)
+        self._recent_lines = [
+            self.ax_raw.plot([], [], 'b-', label='Pitch Filtrado', animated=True)[0],
+            self.ax_raw.plot([], [], 'g-', label='Roll Filtrado', animated=True)[0],
+            self.ax_raw.plot([], [], 'b--', alpha=0.7, label='Pitch Bruto', animated=True)[0],
+            self.ax_raw.plot([], [], 'g--', alpha=0.7, label='Roll Bruto', animated=True)[0],
+        ]
+        self.ax_raw.legend()
+        
+        self._artists = (self._edge_lines + [self._angle_text,
+                         self.ax_pitch.title, self._pitch_line, self._raw_pitch_line,
+                         self.ax_roll.title, self._roll_line, self._raw_roll_line] + self._recent_lines)
         
     def create_arduino_shape(self):
         """Cria a forma do prisma representando o Arduino"""
@@ -268,10 +393,10 @@ class IMUVisualizer:
         w, h, d = 1.8, 0.3, 0.7
         
         # Vértices do prisma
-        self.vertices = np.array([
+        self.vertices = np.ascontiguousarray([
             [-w/2, -h/2, -d/2], [w/2, -h/2, -d/2], [w/2, h/2, -d/2], [-w/2, h/2, -d/2],  # Face inferior
             [-w/2, -h/2, d/2],  [w/2, -h/2, d/2],  [w/2, h/2, d/2],  [-w/2, h/2, d/2]    # Face superior
-        ])
+        ], dtype=np.float32)
         
         # Faces do prisma (índices dos vértices)
         self.faces = [
@@ -282,71 +407,72 @@ class IMUVisualizer:
             [1, 2, 6, 5],  # Face direita
             [4, 7, 3, 0]   # Face esquerda
         ]
+        # Primeiro vértice repetido no final para fechar cada face
+        self._closed_faces = [face + face[:1] for face in self.faces]
         
     def update_3d_visualization(self):
         """Atualiza a visualização 3D"""
-        self.ax_3d.clear()
-        self.setup_3d_plot()
-        
         # Aplica rotação aos vértices
         rotation_matrix = self.processor.get_rotation_matrix(
             self.processor.current_pitch, 
             self.processor.current_roll
         )
         
-        rotated_vertices = np.array([rotation_matrix @ v for v in self.vertices])
+        rotated_vertices = self.vertices @ rotation_matrix.T  # Todos os vértices num só produto
         
-        # Desenha as faces do prisma
-        colors = ['red', 'blue', 'green', 'yellow', 'orange', 'purple']
-        for i, face in enumerate(self.faces):
+        # Atualiza as arestas de cada face
+        for line, face in zip(self._edge_lines, self._closed_faces):
             face_vertices = rotated_vertices[face]
-            # Adiciona o primeiro vértice no final para fechar a face
-            face_vertices = np.vstack([face_vertices, face_vertices[0]])
-            
-            self.ax_3d.plot(face_vertices[:, 0], face_vertices[:, 1], face_vertices[:, 2], 
-                           color=colors[i % len(colors)], linewidth=2)
+            line.set_data(face_vertices[:, 0], face_vertices[:, 1])
+            line.set_3d_properties(face_vertices[:, 2])
         
-        # Adiciona informações de texto
-        self.ax_3d.text2D(0.05, 0.95, f'Pitch: {self.processor.current_pitch:.1f}°', 
-                         transform=self.ax_3d.transAxes, fontsize=12, weight='bold')
-        self.ax_3d.text2D(0.05, 0.85, f'Roll: {self.processor.current_roll:.1f}°', 
-                         transform=self.ax_3d.transAxes, fontsize=12, weight='bold')
+        # Atualiza informações de texto
+        self._angle_text.set_text(f'Pitch: {self.processor.current_pitch:.1f}°\n'
+                                  f'Roll: {self.processor.current_roll:.1f}°')
         
     def update_2d_plots(self):
         """Atualiza os gráficos 2D"""
-        if len(self.processor.pitch_history) > 1:
-            x = range(len(self.processor.pitch_history))
+        self.ax_pitch.title.set_text(f'Pitch: {self.processor.current_pitch:.1f}°')
+        self.ax_roll.title.set_text(f'Roll: {self.processor.current_roll:.1f}°')
+        
+        history = self.processor.ordered_history
+        if len(history) > 1:
+            x = np.arange(len(history))
             
             # Gráfico de Pitch
-            self.ax_pitch.clear()
-            self.ax_pitch.plot(x, list(self.processor.pitch_history), 'b-', label='Filtrado', linewidth=2)
-            self.ax_pitch.plot(x, list(self.processor.raw_pitch_history), 'r-', alpha=0.5, label='Bruto')
-            self.ax_pitch.set_title(f'Pitch: {self.processor.current_pitch:.1f}°')
-            self.ax_pitch.set_ylim([-90, 90])
-            self.ax_pitch.grid(True)
-            self.ax_pitch.legend()
+            self._pitch_line.set_data(x, history[:, 0])
+            self._raw_pitch_line.set_data(x, history[:, 2])
             
             # Gráfico de Roll
-            self.ax_roll.clear()
-            self.ax_roll.plot(x, list(self.processor.roll_history), 'g-', label='Filtrado', linewidth=2)
-            self.ax_roll.plot(x, list(self.processor.raw_roll_history), 'r-', alpha=0.5, label='Bruto')
-            self.ax_roll.set_title(f'Roll: {self.processor.current_roll:.1f}°')
-            self.ax_roll.set_ylim([-180, 180])
-            self.ax_roll.grid(True)
-            self.ax_roll.legend()
+            self._roll_line.set_data(x, history[:, 1])
+            self._raw_roll_line.set_data(x, history[:, 3])
             
-            # Comparação Raw vs Filtrado
-            self.ax_raw.clear()
-            recent_data = min(100, len(x))  # Últimos 100 pontos
-            x_recent = x[-recent_data:]
-            self.ax_raw.plot(x_recent, list(self.processor.pitch_history)[-recent_data:], 'b-', label='Pitch Filtrado')
-            self.ax_raw.plot(x_recent, list(self.processor.raw_pitch_history)[-recent_data:], 'b--', alpha=0.7, label='Pitch Bruto')
-            self.ax_raw.plot(x_recent, list(self.processor.roll_history)[-recent_data:], 'g-', label='Roll Filtrado')
-            self.ax_raw.plot(x_recent, list(self.processor.raw_roll_history)[-recent_data:], 'g--', alpha=0.7, label='Roll Bruto')
-            self.ax_raw.set_title('Comparação: Dados Brutos vs Filtrados')
-            self.ax_raw.set_ylim([-90, 90])
-            self.ax_raw.grid(True)
-            self.ax_raw.legend()
+            # Comparação Raw vs Filtrado (linhas na mesma ordem das colunas do histórico)
+            recent = history[-self.recent_size:]  # Últimos 100 pontos
+            x_recent = x[:len(recent)]
+            for column, line in enumerate(self._recent_lines):
+                line.set_data(x_recent, recent[:, column])
+    
+    def on_draw(self, event):
+        """Guarda o fundo após um redesenho completo (início, redimensionamento, rotação 3D)"""
+        self._bg = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self.draw_artists()
+    
+    def draw_artists(self):
+        """Desenha só as linhas e textos animados"""
+        for artist in self._artists:
+            artist.axes.draw_artist(artist)
+    
+    def render(self):
+        """Mostra o frame atual: restaura o fundo em cache e faz blit dos artistas animados"""
+        canvas = self.fig.canvas
+        if self._bg is None:
+            canvas.draw()  # Primeiro redesenho completo - on_draw captura o fundo
+        else:
+            canvas.restore_region(self._bg)
+            self.draw_artists()
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
 
 def main():
     # Windows: 'COM3', 'COM4', etc.
@@ -408,38 +534,23 @@ def main():
     print("Iniciando visualização... Pressione Ctrl+C para parar")
     print("Incline o Arduino para ver a resposta na tela!")
     
-    # Contador para detectar problemas
-    no_change_count = 0
-    last_values = (0, 0, 0)
-    
     try:
         plt.ion()  # Modo interativo
+        plt.show(block=False)
         
         while True:
             # Lê dados da IMU
-            if processor.read_imu_packet():
-                # Calcula ângulos
-                pitch, roll = processor.calculate_angles()
-                
-                # Detecta se os valores não estão mudando
-                current_values = (round(processor.ax, 2), round(processor.ay, 2), round(processor.az, 2))
-                if current_values == last_values:
-                    no_change_count += 1
-                    if no_change_count > 100:  # ~1 segundo
-                        print(f"\n  PROBLEMA: Valores não mudam há {no_change_count} leituras!")
-                        print("   Tente mover o Arduino ou verificar a conexão")
-                        no_change_count = 0
-                else:
-                    no_change_count = 0
-                    last_values = current_values
+            samples = processor.read_imu_batch()
+            if samples is not None:
+                # Calcula ângulos de todos os pacotes lidos
+                pitch, roll = processor.process_batch(samples[:, :3])
                 
                 # Atualiza visualizações
                 visualizer.update_3d_visualization()
                 visualizer.update_2d_plots()
                 
-                # Atualiza display
-                plt.tight_layout()
-                plt.pause(0.01)
+                # Atualiza display (blitting)
+                visualizer.render()
                 
                 # Informações no console (menos verboso)
                 if not debug_mode:
@@ -457,6 +568,6 @@ def main():
 
 if __name__ == "__main__":
     print("=== Sistema de Monitoramento IMU ===")
-    print("Requisitos: pip install pyserial numpy matplotlib")
+    print("Requisitos: pip install pyserial numpy matplotlib (opcional: numba)")
     print()
     main()
\ No newline at end of file
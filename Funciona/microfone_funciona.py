@@ -1,81 +1,177 @@
 import socket
+import select
 import struct
 import numpy as np
 import wave
 import threading
 import queue
 import time
+import os
+import sys
 from datetime import datetime
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import speech_recognition as sr
 import pyttsx3
 import pyaudio
 
+# Wake word local (opcional): openWakeWord + onnxruntime
+try:
+    from openwakeword.model import Model as WakeWordModel
+except ImportError:
+    WakeWordModel = None
+
+# Cabeçalho do AudioPacket do Arduino: uint32 timestamp + 4x uint16, little-endian sem padding (12 bytes)
+_HDR = struct.Struct('<LHHHH')
+_HDR_SIZE = _HDR.size
+
+# Chunk enviado para a fila: potência de 2 (~0.512s a 16 kHz) - frames sem sobra para o NumPy
+_CHUNK_SAMPLES = 8192
+
+# SO_RCVBUFFORCE (Linux, root) ignora net.core.rmem_max; nem toda versão do Python exporta a constante
+_SO_RCVBUFFORCE = getattr(socket, 'SO_RCVBUFFORCE', 33 if sys.platform.startswith('linux') else None)
+
+def _mean_abs_i16(samples):
+    """Nível médio absoluto de áudio int16 (acumulando em int32, sem overflow em -32768)"""
+    return np.abs(samples, dtype=np.int32).mean()
+
 class AudioReceiver:
     def __init__(self, port=8888):
         self.port = port
         self.socket = None
+        self.sockets = []
+        self.rcvbuf_size = 4 * 1024 * 1024  # Absorve rajadas dos dois Arduinos
         self.running = False
+        # Par de sockets para acordar o select de receive_loop na parada (funciona também no Windows)
+        self._shutdown_r, self._shutdown_w = socket.socketpair()
         self.audio_queue = queue.Queue()
-        self._just_finished_recording = False
+        self._gen = 0  # Geração da sessão - chunks de gerações anteriores são descartados
+        
+        # TTS em thread própria - process_audio nunca bloqueia falando
+        self.tts_queue = queue.Queue()
+        self._tts_active = False
         
         # Configurações de áudio
         self.sample_rate = 16000
         self.channels = 1
         self.sample_width = 2  # 16-bit
         
-        # Buffers por dispositivo
+        # Buffers por dispositivo (ring de int16 pré-alocado + posição de escrita)
         self.device_buffers = {
-            1: [],  # Motorista
-            2: []   # Passageiro
+            1: np.zeros(self.sample_rate * 4, dtype=np.int16),  # Motorista
+            2: np.zeros(self.sample_rate * 4, dtype=np.int16)   # Passageiro
         }
+        self.device_buffer_pos = {1: 0, 2: 0}
+        # Com SO_REUSEPORT há duas threads de recepção, e fontes diferentes podem cair no mesmo ID
+        # (firmware com ID fixo, ID inválido ou pacote sem cabeçalho vão para o 1)
+        self.device_buffer_locks = {1: threading.Lock(), 2: threading.Lock()}
         
-        # Buffers contínuos por dispositivo para wake word
+        # Buffers contínuos por dispositivo para wake word (circulares, últimos 3s)
         self.device_continuous_buffers = {
-            1: [],  # Motorista
-            2: []   # Passageiro
+            1: np.zeros(self.sample_rate * 3, dtype=np.int16),  # Motorista
+            2: np.zeros(self.sample_rate * 3, dtype=np.int16)   # Passageiro
         }
+        self._cb_pos = {1: 0, 2: 0}   # Próxima posição de escrita
+        self._cb_fill = {1: 0, 2: 0}  # Samples válidos no buffer
+        self._cb_written = {1: 0, 2: 0}  # Total de samples já escritos (não zera ao limpar)
         
         # Sistema de ativação por palavra-chave
         self.wake_words = {
             1: "motorista",  # Motorista
             2: "passageiro"   # Passageiro
         }
+        self._device_name = {1: "Motorista", 2: "Passageiro"}
+        self._wake_lower = {k: v.lower() for k, v in self.wake_words.items()}
+        self._ready_banner = (
+            "\n" + "="*70 + "\n"
+            "💤 SISTEMA PRONTO PARA PRÓXIMOS WAKE WORDS:\n"
+            f"  🚗 Motorista: Diga '{self.wake_words[1]}'\n"
+            f"  🧑‍🤝‍🧑 Passageiro: Diga '{self.wake_words[2]}'\n"
+            + "="*70 + "\n"
+        )
         self.listening_mode = False
         self.active_device = None  # Qual dispositivo está gravando
-        self.recording_buffer = []
+        self.recording_buffer = []  # Chunks int16 (np.ndarray), concatenados só no fim
+        self.recorded_samples = 0
         self.silence_counter = 0
         self.max_silence_frames = 20  # ~2 segundos de silêncio
+        self.min_silence_threshold = 150    # Piso do limiar de silêncio adaptativo
+        self.recording_noise_floor = None   # Ruído de fundo da sessão (EMA), medido na gravação
+        
+        # Medidor de nível (barras pré-montadas). Chunks chegam a cada ~0.5s: o intervalo mínimo de
+        # meio chunk deixa passar um por chunk em tempo real e só corta rajadas de fila acumulada
+        self._bars = ["█" * i + " " * (20 - i) for i in range(21)]
+        self._meter_interval = _CHUNK_SAMPLES / self.sample_rate / 2
+        self._last_print = 0.0
+        
+        # VAD local (energia + zero-crossing) antes de chamar o Google STT
+        self.vad_frame_size = self.sample_rate // 50  # Sub-frames de 20ms
+        self.vad_min_voiced_frames = 15               # Mínimo de sub-frames com voz na janela
+        self.vad_noise_floor = {1: 1e4, 2: 1e4}       # Energia de ruído por dispositivo (EMA)
         
         # Gravação completa de sessão
-        self.session_audio = []
+        self.session_audio = []  # Chunks int16 (np.ndarray), concatenados só ao salvar
         self.session_recording = False
         self.session_start_time = None
         
         # Controle de logs por dispositivo
         self.last_status_time = 0
-        self.packet_count = {1: 0, 2: 0}
-        self.bytes_received = {1: 0, 2: 0}
+        self.packet_count = defaultdict(int, {1: 0, 2: 0})
+        self.bytes_received = defaultdict(int, {1: 0, 2: 0})
         
         # Debug - contadores de detecção
         self.wake_word_attempts = {1: 0, 2: 0}
-        self.last_recognition_time = 0
+        self.last_recognition_time = defaultdict(float)  # Throttle por dispositivo
         
         # Voice Assistant
         self.recognizer = sr.Recognizer()
+        
+        # Google STT fora da thread de áudio: resultados voltam para process_audio pela fila
+        self._stt_pool = ThreadPoolExecutor(max_workers=2)
+        self.stt_results = queue.Queue()
+        self._wake_pending = set()  # Dispositivos com tentativa de wake word em andamento
         self.tts = pyttsx3.init()
         self.setup_tts()
         
         # PyAudio para reprodução
         self.audio = pyaudio.PyAudio()
         
+        # Modelos locais de wake word (um por dispositivo - cada um mantém o estado do seu stream)
+        self.wake_word_model_paths = {
+            1: "models/motorista.onnx",
+            2: "models/passageiro.onnx"
+        }
+        self.wake_word_threshold = 0.5
+        self.wake_word_frame = 1280  # 80ms a 16 kHz, janela nativa do openWakeWord
+        self.wake_word_models = self.load_wake_word_models()
+        
         print("=== Sistema Voice Assistant Multi-Dispositivo ===")
         print(f"Porta UDP: {self.port}")
         print(f"Sample Rate: {self.sample_rate} Hz")
+        print(f"Detecção de wake word: {'local (openWakeWord)' if self.wake_word_models else 'Google Speech'}")
         print("Wake Words configuradas:")
         print(f"  Motorista (ID 1): '{self.wake_words[1]}'")
         print(f"  Passageiro (ID 2): '{self.wake_words[2]}'")
         print("Aguardando conexão dos Arduinos...")
         
+    def load_wake_word_models(self):
+        """Carregar modelos ONNX de wake word, se openWakeWord e os arquivos estiverem disponíveis"""
+        if WakeWordModel is None:
+            return None
+        
+        if not all(os.path.exists(path) for path in self.wake_word_model_paths.values()):
+            print("⚠️  Modelos de wake word não encontrados - usando Google Speech para wake word")
+            return None
+        
+        try:
+            return {
+                device_id: WakeWordModel(wakeword_models=[path], inference_framework='onnx')
+                for device_id, path in self.wake_word_model_paths.items()
+            }
+        except Exception as e:
+            print(f"⚠️  Erro ao carregar modelos de wake word: {e}")
+            return None
+        
     def setup_tts(self):
         """Configurar Text-to-Speech"""
         voices = self.tts.getProperty('voices')
@@ -94,18 +190,21 @@ class AudioReceiver:
     def start_server(self):
         """Iniciar servidor UDP"""
         try:
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            self.socket.bind(('0.0.0.0', self.port))
-            self.socket.settimeout(1.0)  # Timeout para permitir parada
+            # Com SO_REUSEPORT o kernel distribui os Arduinos (por endereço de origem) entre os sockets
+            reuse_port = hasattr(socket, 'SO_REUSEPORT')
+            self.sockets = [self.create_socket(reuse_port) for _ in range(2 if reuse_port else 1)]
+            self.socket = self.sockets[0]
             self.running = True
             
             print(f"Servidor iniciado em 0.0.0.0:{self.port}")
             print("Aguardando dados de áudio dos Arduinos...")
             
-            # Iniciar threads
-            threading.Thread(target=self.receive_loop, daemon=True).start()
+            # Iniciar threads (uma de recepção por socket)
+            for sock in self.sockets:
+                threading.Thread(target=self.receive_loop, args=(sock,), daemon=True).start()
             threading.Thread(target=self.process_audio, daemon=True).start()
             threading.Thread(target=self.status_monitor, daemon=True).start()
+            threading.Thread(target=self.tts_worker, daemon=True).start()
             
             return True
             
@@ -113,16 +212,50 @@ class AudioReceiver:
             print(f"Erro ao iniciar servidor: {e}")
             return False
     
-    def receive_loop(self):
+    def create_socket(self, reuse_port):
+        """Criar socket UDP com buffer de recepção ampliado"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        if reuse_port:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        
+        forced = False
+        if _SO_RCVBUFFORCE is not None:
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, _SO_RCVBUFFORCE, self.rcvbuf_size)
+                forced = True
+            except OSError:
+                pass  # Sem privilégio - cai no SO_RCVBUF (limitado por rmem_max)
+        if not forced:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.rcvbuf_size)
+        
+        sock.bind(('0.0.0.0', self.port))
+        sock.setblocking(False)  # Espera feita via select em receive_loop
+        return sock
+    
+    def receive_loop(self, sock):
         """Loop principal de recepção UDP"""
+        # Pool de buffers: a cada wakeup drena até 32 datagramas antes de processar
+        rx_views = [memoryview(bytearray(4096)) for _ in range(32)]
+        
         while self.running:
             try:
-                data, addr = self.socket.recvfrom(4096)
-                if len(data) > 0:
+                # Sem timeout: stop() acorda o select escrevendo em _shutdown_w
+                readable, _, _ = select.select([sock, self._shutdown_r], [], [])
+                if self._shutdown_r in readable:
+                    break
+                
+                batch = []
+                for view in rx_views:
+                    try:
+                        nbytes, addr = sock.recvfrom_into(view)
+                    except BlockingIOError:
+                        break  # Socket vazio
+                    if nbytes > 0:
+                        batch.append((view[:nbytes], addr))
+                
+                for data, addr in batch:
                     self.process_packet(data, addr)
                     
-            except socket.timeout:
-                continue
             except Exception as e:
                 if self.running:
                     print(f"Erro na recepção: {e}")
@@ -130,61 +263,51 @@ class AudioReceiver:
     def process_packet(self, data, addr):
         """Processar pacote recebido"""
         try:
-            device_id = 1  # Padrão
-            
             # Verificar se é o primeiro pacote (com cabeçalho)
-            if len(data) >= 12:  # Tamanho mínimo do cabeçalho
-                # Tentar decodificar cabeçalho
-                header_size = struct.calcsize('LHHHH')
-                if len(data) >= header_size:
-                    try:
-                        header = struct.unpack('LHHHH', data[:header_size])
-                        timestamp, device_id, sample_rate, samples_count, checksum = header
-                        audio_data = data[header_size:]
-                        
-                        # Debug: mostrar dispositivo detectado
-                        if device_id not in [1, 2]:
-                            print(f"⚠️  Device ID inválido recebido: {device_id}, usando ID 1")
-                            device_id = 1
-                            
-                    except Exception as e:
-                        # Falha na decodificação, tratar como dados de áudio
-                        audio_data = data
-                        device_id = 1
-                else:
-                    # Pacote só com dados de áudio
-                    audio_data = data
+            if len(data) >= _HDR_SIZE:
+                timestamp, device_id, sample_rate, samples_count, checksum = _HDR.unpack_from(data)
+                audio_data = memoryview(data)[_HDR_SIZE:]
+                
+                # Debug: mostrar dispositivo detectado
+                if device_id not in (1, 2):
+                    print(f"⚠️  Device ID inválido recebido: {device_id}, usando ID 1")
                     device_id = 1
             else:
+                # Pacote só com dados de áudio
                 audio_data = data
                 device_id = 1
             
-            # Atualizar contadores por dispositivo
-            if device_id not in self.packet_count:
-                self.packet_count[device_id] = 0
-                self.bytes_received[device_id] = 0
-                
-            self.packet_count[device_id] += 1
-            self.bytes_received[device_id] += len(data)
+            # Converter bytes para samples int16 (view sem cópia; '<i2' = little-endian do Arduino)
+            num_samples = len(audio_data) >> 1
+            valid = num_samples and not len(audio_data) & 1
+            if valid:
+                samples = np.frombuffer(audio_data, dtype='<i2')
             
-            # Converter bytes para samples int16
-            if len(audio_data) % 2 == 0 and len(audio_data) > 0:
-                samples = struct.unpack(f'{len(audio_data)//2}h', audio_data)
-                
-                # Inicializar buffer se não existir
-                if device_id not in self.device_buffers:
-                    self.device_buffers[device_id] = []
-                
-                # Adicionar ao buffer do dispositivo
-                self.device_buffers[device_id].extend(samples)
+            with self.device_buffer_locks[device_id]:
+                # Atualizar contadores por dispositivo
+                self.packet_count[device_id] += 1
+                self.bytes_received[device_id] += len(data)
                 
-                # Se buffer está grande o suficiente, processar
-                if len(self.device_buffers[device_id]) >= self.sample_rate // 2:  # 0.5 segundos
-                    audio_chunk = np.array(self.device_buffers[device_id][:self.sample_rate//2], dtype=np.int16)
-                    self.device_buffers[device_id] = self.device_buffers[device_id][self.sample_rate//2:]
+                if valid:
+                    # Adicionar ao buffer do dispositivo (atributos em variáveis locais - caminho quente)
+                    buffer_pos = self.device_buffer_pos
+                    buffer = self.device_buffers[device_id]
+                    pos = buffer_pos[device_id]
+                    buffer[pos:pos + num_samples] = samples
+                    pos += num_samples
                     
-                    # Adicionar à fila de processamento
-                    self.audio_queue.put((device_id, audio_chunk))
+                    # Se buffer está grande o suficiente, processar
+                    if pos >= _CHUNK_SAMPLES:
+                        queue_put = self.audio_queue.put
+                        while pos >= _CHUNK_SAMPLES:
+                            # Adicionar à fila de processamento
+                            queue_put((self._gen, device_id, buffer[:_CHUNK_SAMPLES].copy()))
+                            
+                            # Mover o restante para o início do buffer
+                            buffer[:pos - _CHUNK_SAMPLES] = buffer[_CHUNK_SAMPLES:pos]
+                            pos -= _CHUNK_SAMPLES
+                    
+                    buffer_pos[device_id] = pos
                     
         except Exception as e:
             print(f"Erro ao processar pacote: {e}")
@@ -204,7 +327,7 @@ class AudioReceiver:
                         if not self.listening_mode and not self.session_recording:
                             print(f"📡 Status Multi-Dispositivo:")
                             for device_id in [1, 2]:
-                                device_name = "Motorista" if device_id == 1 else "Passageiro"
+                                device_name = self._device_name[device_id]
                                 packets = self.packet_count.get(device_id, 0)
                                 bytes_recv = self.bytes_received.get(device_id, 0)
                                 attempts = self.wake_word_attempts.get(device_id, 0)
@@ -236,45 +359,54 @@ class AudioReceiver:
         """Thread para processar áudio e voice assistant"""
         while self.running:
             try:
-                if not self.audio_queue.empty():
-                    device_id, audio_data = self.audio_queue.get(timeout=1.0)
+                # Tratar reconhecimentos concluídos pelo pool de STT
+                self.handle_stt_results()
+                
+                # Bloqueia até process_packet enfileirar um chunk, depois drena o que já estiver na fila
+                batch = [self.audio_queue.get(timeout=0.5)]
+                while True:
+                    try:
+                        batch.append(self.audio_queue.get_nowait())
+                    except queue.Empty:
+                        break
 
-                    # Limpa buffers logo após terminar gravação
-                    if self._just_finished_recording:
-                        print("🧹 Limpando buffers após gravação...")
-                        # Limpar buffers contínuos de todos os dispositivos
-                        for dev_id in self.device_continuous_buffers:
-                            self.device_continuous_buffers[dev_id].clear()
-                        # Limpar fila de áudio
-                        try:
-                            with self.audio_queue.mutex:
-                                self.audio_queue.queue.clear()
-                        except:
-                            pass
-                        self._just_finished_recording = False
-                        print("✅ Buffers limpos - Sistema pronto para novos wake words!")
-                        time.sleep(2)  # Pausa maior para estabilizar
-                        continue
+                # Descarta áudio enquanto o assistente fala (evita detectar a própria voz)
+                if self._tts_active:
+                    continue
 
-                    # Inicializar buffer contínuo se não existir
-                    if device_id not in self.device_continuous_buffers:
-                        self.device_continuous_buffers[device_id] = []
+                # Agrupar chunks por dispositivo (mantendo a ordem de chegada),
+                # ignorando os enfileirados antes do fim da última gravação
+                generation = self._gen
+                device_chunks = {}
+                for gen, device_id, audio_data in batch:
+                    if gen == generation:
+                        device_chunks.setdefault(device_id, []).append(audio_data)
+
+                for device_id, chunks in device_chunks.items():
+                    # Uma gravação terminou no meio do batch: o restante é antigo
+                    if self._gen != generation:
+                        break
 
                     # Mantém últimos 3s de áudio por dispositivo (reduzido para melhor responsividade)
-                    self.device_continuous_buffers[device_id].extend(audio_data)
-                    max_buf = self.sample_rate * 3
-                    if len(self.device_continuous_buffers[device_id]) > max_buf:
-                        self.device_continuous_buffers[device_id] = self.device_continuous_buffers[device_id][-max_buf:]
+                    merged = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+                    self._push_continuous(device_id, merged)
 
                     # Verificar modo atual
                     if not self.listening_mode and not self.session_recording:
                         # Modo de detecção de wake word
-                        self.detect_wake_word(self.device_continuous_buffers[device_id], device_id)
+                        if self.wake_word_models:
+                            # Modelo local: processa todo o áudio novo, em janelas de 80ms
+                            self.detect_wake_word_local(merged, device_id)
+                        else:
+                            # Google STT: uma tentativa sobre o áudio mais recente
+                            self.detect_wake_word(device_id)
                     elif self.listening_mode and device_id == self.active_device:
                         # Modo de gravação ativa - só processar áudio do dispositivo ativo
-                        self.process_active_recording(audio_data, device_id)
-                else:
-                    time.sleep(0.1)
+                        # (chunk a chunk, o contador de silêncio é medido em chunks de ~0.5s)
+                        for audio_data in chunks:
+                            if not self.listening_mode:
+                                break
+                            self.process_active_recording(audio_data, device_id)
             except queue.Empty:
                 continue
             except Exception as e:
@@ -284,50 +416,148 @@ class AudioReceiver:
                 self.active_device = None
                 self.session_recording = False
 
-    def detect_wake_word(self, audio_buffer, device_id):
+    def _push_continuous(self, device_id, chunk):
+        """Escrever chunk no buffer circular contínuo do dispositivo"""
+        buffer = self.device_continuous_buffers[device_id]
+        size = len(buffer)
+        if len(chunk) > size:
+            chunk = chunk[-size:]
+        
+        n = len(chunk)
+        pos = self._cb_pos[device_id]
+        first = min(n, size - pos)
+        buffer[pos:pos + first] = chunk[:first]
+        buffer[:n - first] = chunk[first:]
+        
+        self._cb_pos[device_id] = (pos + n) % size
+        self._cb_fill[device_id] = min(self._cb_fill[device_id] + n, size)
+        self._cb_written[device_id] += n
+    
+    def _latest_continuous(self, device_id, count):
+        """Últimos `count` samples do buffer contínuo em ordem cronológica"""
+        buffer = self.device_continuous_buffers[device_id]
+        pos = self._cb_pos[device_id]
+        if pos >= count:
+            return buffer[pos - count:pos]  # View contígua, sem cópia
+        return np.concatenate((buffer[pos - count:], buffer[:pos]))
+    
+    def _clear_continuous(self, device_id):
+        """Descartar o conteúdo do buffer contínuo do dispositivo"""
+        self._cb_pos[device_id] = 0
+        self._cb_fill[device_id] = 0
+
+    def _vad(self, chunk, device_id):
+        """VAD por energia e taxa de cruzamento por zero em sub-frames de 20ms"""
+        frame = self.vad_frame_size
+        frames = chunk[:len(chunk) // frame * frame].reshape(-1, frame).astype(np.int32)
+        
+        energy = np.mean(frames ** 2, axis=1)
+        zcr = np.mean(np.diff(np.signbit(frames).astype(np.int8), axis=1) != 0, axis=1)
+        
+        # Atualiza o piso de ruído com os sub-frames mais quietos da janela
+        noise_floor = self.vad_noise_floor[device_id]
+        noise_floor = 0.9 * noise_floor + 0.1 * np.percentile(energy, 10)
+        self.vad_noise_floor[device_id] = noise_floor
+        
+        # Voz: energia bem acima do ruído e ZCR fora da faixa de tom puro / ruído de banda larga
+        voiced = (energy > noise_floor * 4) & (zcr > 0.01) & (zcr < 0.35)
+        return int(voiced.sum()) >= self.vad_min_voiced_frames
+
+    def detect_wake_word(self, device_id):
         """Detectar palavra de ativação"""
         try:
             # Evitar processamento muito frequente
             current_time = time.time()
-            if current_time - self.last_recognition_time < 1.0:  # Mínimo 1 segundo entre tentativas
+            if current_time - self.last_recognition_time[device_id] < 1.0:  # Mínimo 1 segundo entre tentativas
+                return
+            if device_id in self._wake_pending:  # Tentativa anterior ainda no Google
                 return
                 
-            detection_length = self.sample_rate * 2  # 2 segundos para detecção
-            if len(audio_buffer) >= detection_length:
-                chunk = np.array(audio_buffer[-detection_length:], dtype=np.int16)
+            detection_length = 4 * _CHUNK_SAMPLES  # ~2 segundos para detecção
+            if self._cb_fill[device_id] >= detection_length:
+                chunk = self._latest_continuous(device_id, detection_length)
                 
                 # Verificar se há áudio suficiente (não só silêncio)
-                audio_level = np.abs(chunk).mean()
+                audio_level = _mean_abs_i16(chunk)
                 if audio_level < 100:  # Muito baixo, provavelmente silêncio
                     return
                 
+                # Só gastar uma chamada de rede se houver voz na janela
+                if not self._vad(chunk, device_id):
+                    return
+                
                 self.wake_word_attempts[device_id] += 1
-                self.last_recognition_time = current_time
+                self.last_recognition_time[device_id] = current_time
                 
                 # Debug: mostrar tentativa
-                device_name = "Motorista" if device_id == 1 else "Passageiro"
+                device_name = self._device_name[device_id]
                 print(f"🔍 Tentando reconhecer wake word - {device_name} (nível: {int(audio_level)})")
                 
-                text = self.recognize_speech(chunk)
-                
-                if text:
-                    print(f"🎯 Reconhecido: '{text}' de {device_name}")
-                    
-                    # Verificar wake word específica do dispositivo
-                    wake_word = self.wake_words.get(device_id, "assistente")
-                    if wake_word.lower() in text.lower():
-                        print(f"\n🎙️  WAKE WORD DETECTADA - {device_name}! Iniciando gravação...")
-                        print("Fale agora - a gravação será salva até você parar de falar.\n")
-                        self.start_recording_session(device_id)
-                        # Limpar buffer para evitar re-detecção
-                        audio_buffer.clear()
-                        return
-                else:
-                    print(f"❌ Não reconhecido - {device_name}")
+                # Cópia própria: o job fica na fila do pool enquanto o buffer circular é sobrescrito
+                self._wake_pending.add(device_id)
+                self.submit_recognition('wake', device_id, chunk.copy(), generation=self._gen,
+                                        window_end=self._cb_written[device_id])
                     
         except Exception as e:
             print(f"Erro na detecção de wake word: {e}")
 
+    def handle_wake_word_result(self, device_id, text, generation, window_end):
+        """Tratar resultado do reconhecimento de wake word"""
+        self._wake_pending.discard(device_id)
+        device_name = self._device_name[device_id]
+        
+        if not text:
+            print(f"❌ Não reconhecido - {device_name}")
+            return
+        
+        print(f"🎯 Reconhecido: '{text}' de {device_name}")
+        
+        # Áudio anterior ao fim da última gravação, ou já há gravação em andamento
+        if generation != self._gen or self.listening_mode or self.session_recording:
+            return
+        
+        # Verificar wake word específica do dispositivo
+        if self._wake_lower.get(device_id, "assistente") in text.lower():
+            print(f"\n🎙️  WAKE WORD DETECTADA - {device_name}! Iniciando gravação...")
+            print("Fale agora - a gravação será salva até você parar de falar.\n")
+            self.start_recording_session(device_id)
+            
+            # Fala durante a ida ao Google (depois da janela enviada) entra no início da gravação;
+            # além de 3s de atraso só resta o que o buffer contínuo ainda guarda
+            late = min(self._cb_written[device_id] - window_end, self._cb_fill[device_id])
+            if late > 0 and self.listening_mode and self.active_device == device_id:
+                pending = self._latest_continuous(device_id, late).copy()
+                for start in range(0, late, _CHUNK_SAMPLES):
+                    if not self.listening_mode:
+                        break
+                    self.process_active_recording(pending[start:start + _CHUNK_SAMPLES], device_id)
+            
+            # Limpar buffer para evitar re-detecção
+            self._clear_continuous(device_id)
+
+    def detect_wake_word_local(self, audio_data, device_id):
+        """Detectar palavra de ativação com o modelo ONNX local do dispositivo"""
+        try:
+            model = self.wake_word_models[device_id]
+            frame = self.wake_word_frame
+            
+            score = 0.0
+            for start in range(0, len(audio_data), frame):
+                prediction = model.predict(audio_data[start:start + frame])
+                score = max(score, max(prediction.values(), default=0.0))
+            
+            if score >= self.wake_word_threshold:
+                device_name = self._device_name[device_id]
+                print(f"\n🎙️  WAKE WORD DETECTADA - {device_name} (score: {score:.2f})! Iniciando gravação...")
+                print("Fale agora - a gravação será salva até você parar de falar.\n")
+                self.start_recording_session(device_id)
+                # Limpar estado do modelo e buffer para evitar re-detecção
+                model.reset()
+                self._clear_continuous(device_id)
+                
+        except Exception as e:
+            print(f"Erro na detecção local de wake word: {e}")
+
     def start_recording_session(self, device_id):
         """Iniciar sessão de gravação"""
         # Garantir que apenas um dispositivo grava por vez
@@ -338,35 +568,50 @@ class AudioReceiver:
         self.listening_mode = True
         self.active_device = device_id
         self.recording_buffer = []
+        self.recorded_samples = 0
         self.silence_counter = 0
+        self.recording_noise_floor = None
         self.session_recording = True
         self.session_start_time = datetime.now()
         self.session_audio = []
         
-        device_name = "Motorista" if device_id == 1 else "Passageiro"
+        device_name = self._device_name[device_id]
         print(f"[{self.session_start_time.strftime('%H:%M:%S')}] 🔴 GRAVAÇÃO INICIADA - {device_name} (ID {device_id})")
 
     def process_active_recording(self, audio_data, device_id):
         """Processar áudio durante gravação ativa"""
         try:
-            # Adicionar ao buffer de gravação
-            self.recording_buffer.extend(audio_data)
-            self.session_audio.extend(audio_data)
+            # Adicionar ao buffer de gravação (guarda o chunk, sem copiar sample a sample)
+            self.recording_buffer.append(audio_data)
+            self.session_audio.append(audio_data)
+            self.recorded_samples += len(audio_data)
             
             # Detectar silêncio
-            audio_level = np.abs(audio_data).mean()
-            silence_threshold = 300  # Threshold mais baixo
+            audio_level = _mean_abs_i16(audio_data)
+            
+            # Ruído de fundo: sub-frames mais quietos do chunk (pausas entre palavras), suavizado por EMA
+            frame = self.vad_frame_size
+            frames = audio_data[:len(audio_data) // frame * frame].reshape(-1, frame)
+            noise_estimate = np.percentile(np.abs(frames, dtype=np.int32).mean(axis=1), 10)
+            if self.recording_noise_floor is None:
+                self.recording_noise_floor = noise_estimate  # Primeiro chunk da sessão calibra
+            else:
+                self.recording_noise_floor = 0.95 * self.recording_noise_floor + 0.05 * noise_estimate
+            
+            silence_threshold = max(self.min_silence_threshold, 2 * self.recording_noise_floor)
             
             if audio_level < silence_threshold:
                 self.silence_counter += 1
             else:
                 self.silence_counter = 0
                 
-            # Mostrar nível de áudio em tempo real
-            bars = int(audio_level / 500)
-            level_display = "█" * min(bars, 20)
-            device_name = "Motorista" if device_id == 1 else "Passageiro"
-            print(f"\r🎙️  [{device_name}] Gravando: [{level_display:<20}] Nível: {int(audio_level)}", end="", flush=True)
+            # Mostrar nível de áudio em tempo real (no máximo um por chunk de tempo real)
+            now = time.monotonic()
+            if now - self._last_print >= self._meter_interval:
+                self._last_print = now
+                device_name = self._device_name[device_id]
+                sys.stdout.write(f"\r🎙️  [{device_name}] Gravando: [{self._bars[min(int(audio_level / 500), 20)]}] Nível: {int(audio_level)}")
+                sys.stdout.flush()
             
             # Se silêncio por muito tempo, finalizar gravação
             if self.silence_counter >= self.max_silence_frames:
@@ -377,7 +622,7 @@ class AudioReceiver:
     
     def stop_recording_session(self, device_id):
         """Finalizar sessão de gravação"""
-        device_name = "Motorista" if device_id == 1 else "Passageiro"
+        device_name = self._device_name[device_id]
         print(f"\n\n⏹️  GRAVAÇÃO FINALIZADA - {device_name} - Processando áudio...")
         
         end_time = datetime.now()
@@ -386,22 +631,12 @@ class AudioReceiver:
         # Salvar áudio completo da sessão
         session_filename = self.save_session_audio(device_id, duration)
         
-        # Processar reconhecimento de voz
-        if len(self.recording_buffer) > 0:
-            full_audio = np.array(self.recording_buffer, dtype=np.int16)
-            text = self.recognize_speech(full_audio)
-            
-            if text:
-                print(f"\n[{device_name.upper()}] Disse: '{text}'")
-                print(f"📁 Áudio salvo: {session_filename}")
-                print(f"⏱️  Duração: {duration:.1f} segundos")
-                
-                # Processar comando e responder
-                response = self.process_command(text, device_id)
-                if response:
-                    self.speak_response(response)
-            else:
-                print("❌ Não foi possível reconhecer a fala")
+        # Processar reconhecimento de voz (em background - a captura segue enquanto o Google responde)
+        recognizing = self.recorded_samples > 0
+        if recognizing:
+            full_audio = np.concatenate(self.recording_buffer)
+            self.submit_recognition('command', device_id, full_audio,
+                                    filename=session_filename, duration=duration)
         
         # Reset do state - ORDEM IMPORTANTE
         self.listening_mode = False
@@ -409,32 +644,53 @@ class AudioReceiver:
         self.active_device = None
         self.recording_buffer = []
         self.session_audio = []
+        self.recorded_samples = 0
         self.silence_counter = 0
 
-        # Sinalizar limpeza de buffers DEPOIS do reset
-        self._just_finished_recording = True
+        # Nova geração DEPOIS do reset: chunks já enfileirados ficam obsoletos
+        for dev_id in self.device_continuous_buffers:
+            self._clear_continuous(dev_id)
+        self._gen += 1
 
-        print("\n" + "="*70)
-        print("💤 SISTEMA PRONTO PARA PRÓXIMOS WAKE WORDS:")
-        print(f"  🚗 Motorista: Diga '{self.wake_words[1]}'")
-        print(f"  🧑‍🤝‍🧑 Passageiro: Diga '{self.wake_words[2]}'")
-        print("="*70 + "\n")
+        if not recognizing:
+            print(self._ready_banner)
+    
+    def handle_command_result(self, device_id, text, filename, duration):
+        """Tratar resultado do reconhecimento do comando gravado"""
+        device_name = self._device_name[device_id]
+        
+        if text:
+            print(f"\n[{device_name.upper()}] Disse: '{text}'")
+            print(f"📁 Áudio salvo: {filename}")
+            print(f"⏱️  Duração: {duration:.1f} segundos")
+            
+            # Processar comando e responder
+            response = self.process_command(text, device_id)
+            if response:
+                self.speak_response(response)
+        else:
+            print("❌ Não foi possível reconhecer a fala")
+        
+        print(self._ready_banner)
     
     def save_session_audio(self, device_id, duration):
         """Salvar áudio completo da sessão"""
         try:
             timestamp = self.session_start_time.strftime('%Y%m%d_%H%M%S')
-            device_name = "motorista" if device_id == 1 else "passageiro"
+            device_name = self._device_name[device_id].lower()
             filename = f"session_{device_name}_{timestamp}_{duration:.1f}s.wav"
             
-            if len(self.session_audio) > 0:
-                audio_array = np.array(self.session_audio, dtype=np.int16)
+            if self.session_audio:
+                audio_array = np.concatenate(self.session_audio)
                 
                 with wave.open(filename, 'wb') as wf:
                     wf.setnchannels(self.channels)
                     wf.setsampwidth(self.sample_width)
                     wf.setframerate(self.sample_rate)
-                    wf.writeframes(audio_array.tobytes())
+                    # nframes já correto no cabeçalho: sem reescrita no close
+                    wf.setnframes(len(audio_array))
+                    # Escreve direto do buffer do ndarray, sem cópia via tobytes()
+                    wf.writeframesraw(memoryview(audio_array).cast('B'))
                 
                 return filename
             else:
@@ -444,6 +700,25 @@ class AudioReceiver:
             print(f"Erro ao salvar sessão: {e}")
             return "Erro ao salvar"
     
+    def submit_recognition(self, kind, device_id, audio_data, **context):
+        """Enviar áudio ao pool de STT; o resultado volta por self.stt_results"""
+        future = self._stt_pool.submit(self.recognize_speech, audio_data)
+        future.add_done_callback(
+            lambda f: self.stt_results.put((kind, device_id, f.result(), context)))
+    
+    def handle_stt_results(self):
+        """Tratar (na thread de áudio) os reconhecimentos já concluídos"""
+        while True:
+            try:
+                kind, device_id, text, context = self.stt_results.get_nowait()
+            except queue.Empty:
+                return
+            
+            if kind == 'wake':
+                self.handle_wake_word_result(device_id, text, **context)
+            else:
+                self.handle_command_result(device_id, text, **context)
+    
     def recognize_speech(self, audio_data):
         """Reconhecer fala usando SpeechRecognition"""
         try:
@@ -471,7 +746,7 @@ class AudioReceiver:
     def process_command(self, text, device_id):
         """Processar comando de voz com contexto do dispositivo"""
         text_lower = text.lower()
-        device_name = "Motorista" if device_id == 1 else "Passageiro"
+        device_name = self._device_name[device_id]
         
         # Comandos básicos
         if any(word in text_lower for word in ['olá', 'oi', 'hey']):
@@ -506,24 +781,39 @@ class AudioReceiver:
             return f"{device_name}, você disse: {text}. Como posso ajudar com isso?"
     
     def speak_response(self, text):
-        """Falar resposta usando TTS"""
-        try:
-            print(f"[ASSISTENTE] Respondendo: '{text}'")
-            self.tts.say(text)
-            self.tts.runAndWait()
-            
-            # Pausa após falar para evitar interferência
-            time.sleep(1)
+        """Enfileirar resposta para a thread de TTS"""
+        print(f"[ASSISTENTE] Respondendo: '{text}'")
+        self.tts_queue.put(text)
+    
+    def tts_worker(self):
+        """Thread de TTS - único consumidor do engine pyttsx3"""
+        while self.running:
+            try:
+                text = self.tts_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
             
-        except Exception as e:
-            print(f"Erro no TTS: {e}")
+            self._tts_active = True
+            try:
+                self.tts.say(text)
+                self.tts.runAndWait()
+                
+                # Pausa após falar para evitar interferência
+                time.sleep(1)
+                
+            except Exception as e:
+                print(f"Erro no TTS: {e}")
+            finally:
+                self._tts_active = False
     
     def stop(self):
         """Parar servidor"""
         print("\nParando servidor...")
         self.running = False
-        if self.socket:
-            self.socket.close()
+        self._shutdown_w.send(b'x')  # Byte não é consumido: acorda todas as threads de recepção
+        for sock in self.sockets:
+            sock.close()
+        self._stt_pool.shutdown(wait=False)
         self.audio.terminate()
 
 def main():
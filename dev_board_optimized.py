@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 import socket
 import struct
+import array
+import sys
 import numpy as np
 import wave
 import threading
@@ -10,6 +12,7 @@ import json
 import os
 from datetime import datetime
 from collections import deque
+from itertools import islice
 import logging
 import vosk
 import subprocess
@@ -185,7 +188,7 @@ class CoralVoiceAssistant:
     
     def receive_loop(self):
         """Receber pacotes UDP com otimização"""
-        header_struct = struct.Struct('IIHHHHHBB')  # I=uint32, H=uint16, B=uint8
+        header_struct = struct.Struct('<IIHHHHBB')  # AudioPacket packed: I=uint32, H=uint16, B=uint8 (18 bytes)
         
         while self.running:
             try:
@@ -293,7 +296,11 @@ class CoralVoiceAssistant:
                         
                         # Adicionar ao buffer circular
                         with self.buffer_locks[device_id]:
-                            samples = struct.unpack(f'{len(audio_data)//2}h', audio_data)
+                            # array 'h' copia em C, sem tupla de ints; Arduino é little-endian
+                            samples = array.array('h')
+                            samples.frombytes(audio_data)
+                            if sys.byteorder == 'big':
+                                samples.byteswap()
                             self.device_buffers[device_id].extend(samples)
                         
                         if is_end or len(self.device_buffers[device_id]) >= self.sample_rate:
@@ -328,11 +335,13 @@ class CoralVoiceAssistant:
                 if len(self.device_buffers[device_id]) < self.sample_rate // 2:
                     return
                 
-                # Pegar últimos 1.5 segundos
-                samples = list(self.device_buffers[device_id])[-int(self.sample_rate * 1.5):]
+                # Pegar últimos 1.5 segundos (cauda do deque, sem copiar o buffer inteiro para uma lista)
+                buffer = self.device_buffers[device_id]
+                count = min(len(buffer), int(self.sample_rate * 1.5))
+                samples = np.fromiter(islice(reversed(buffer), count), dtype=np.int16, count=count)
             
-            # Converter para bytes
-            audio_bytes = struct.pack(f'{len(samples)}h', *samples)
+            # Converter para bytes (reverter para a ordem cronológica)
+            audio_bytes = samples[::-1].tobytes()
             
             # Resetar recognizer para limpar estado
             self.recognizers[device_id].Reset()
@@ -508,16 +517,15 @@ class CoralVoiceAssistant:
             safe_text = "".join(c for c in text[:30] if c.isalnum() or c in (' ', '-', '_')).strip()
             filename = f"recordings/{device_name}_{timestamp}_{safe_text}.wav"
             
-            # Converter para array numpy
-            samples = struct.unpack(f'{len(audio_data)//2}h', audio_data)
-            audio_array = np.array(samples, dtype=np.int16)
+            # audio_data já é PCM int16 - gravar direto, sem reconverter
+            num_samples = len(audio_data) // self.sample_width
             
             # Salvar WAV
             with wave.open(filename, 'wb') as wf:
                 wf.setnchannels(self.channels)
                 wf.setsampwidth(self.sample_width)
                 wf.setframerate(self.sample_rate)
-                wf.writeframes(audio_array.tobytes())
+                wf.writeframes(audio_data)
             
             # Salvar metadados
             metadata = {
@@ -525,7 +533,7 @@ class CoralVoiceAssistant:
                 'device_name': device_name,
                 'timestamp': timestamp,
                 'text': text,
-                'duration': len(audio_array) / self.sample_rate
+                'duration': num_samples / self.sample_rate
             }
             
             with open(f"{filename}.json", 'w', encoding='utf-8') as f:
@@ -1,5 +1,7 @@
 import socket
 import struct
+import array
+import sys
 import numpy as np
 import wave
 import threading
@@ -10,6 +12,7 @@ import speech_recognition as sr
 import pyttsx3
 import os
 from collections import deque
+from itertools import islice
 import logging
 
 # Configurar logging
@@ -18,6 +21,10 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+def _mean_abs_i16(samples):
+    """Nível médio absoluto de áudio int16 (acumulando em int32, sem overflow em -32768)"""
+    return np.abs(samples, dtype=np.int32).mean()
+
 class AudioReceiver:
     def __init__(self, port=8888):
         self.port = port
@@ -26,6 +33,7 @@ class AudioReceiver:
         
         # Thread-safe queues
         self.audio_queue = queue.Queue(maxsize=100)
+        self.tts_queue = queue.Queue()
         
         # Configurações de áudio
         self.sample_rate = 16000
@@ -103,6 +111,7 @@ class AudioReceiver:
             threading.Thread(target=self.receive_loop, daemon=True).start()
             threading.Thread(target=self.process_audio, daemon=True).start()
             threading.Thread(target=self.status_monitor, daemon=True).start()
+            threading.Thread(target=self.tts_worker, daemon=True).start()
             
             logging.info(f"Servidor iniciado em 0.0.0.0:{self.port}")
             return True
@@ -113,16 +122,21 @@ class AudioReceiver:
     
     def receive_loop(self):
         """Loop de recepção UDP"""
-        header_struct = struct.Struct('LLHHHHHBB')
+        # AudioPacket packed do Arduino: 8 campos, 18 bytes, little-endian
+        header_struct = struct.Struct('<IIHHHHBB')
+        
+        # Buffer de recepção reutilizado - os samples são copiados antes do próximo recv
+        rx_buffer = bytearray(4096)
+        rx_view = memoryview(rx_buffer)
         
         while self.running:
             try:
-                data, addr = self.socket.recvfrom(4096)
-                if len(data) < header_struct.size:
+                nbytes, addr = self.socket.recvfrom_into(rx_buffer)
+                if nbytes < header_struct.size:
                     continue
                     
                 # Decodificar header
-                header = header_struct.unpack(data[:header_struct.size])
+                header = header_struct.unpack_from(rx_buffer, 0)
                 sequence, timestamp, device_id, sample_rate, samples_count, checksum, flags, _ = header
                 
                 # Validar device_id
@@ -131,7 +145,7 @@ class AudioReceiver:
                     continue
                 
                 # Extrair dados de áudio
-                audio_data = data[header_struct.size:]
+                audio_data = rx_view[header_struct.size:nbytes]
                 expected_size = samples_count * 2
                 
                 if len(audio_data) != expected_size:
@@ -146,12 +160,15 @@ class AudioReceiver:
                     self.stats[device_id]['errors'] += 1
                     continue
                 
-                # Converter para samples
-                samples = struct.unpack(f'{samples_count}h', audio_data)
+                # Converter para samples (array 'h' copia em C, sem tupla de ints; Arduino é little-endian)
+                samples = array.array('h')
+                samples.frombytes(audio_data)
+                if sys.byteorder == 'big':
+                    samples.byteswap()
                 
                 # Atualizar estatísticas
                 self.stats[device_id]['packets'] += 1
-                self.stats[device_id]['bytes'] += len(data)
+                self.stats[device_id]['bytes'] += nbytes
                 self.stats[device_id]['last_seen'] = time.time()
                 
                 # Verificar flags
@@ -213,7 +230,10 @@ class AudioReceiver:
                     else:
                         # Modo detecção wake word
                         with self.buffer_locks[device_id]:
-                            buffer_copy = list(self.device_buffers[device_id])[-wake_word_buffer_size:]
+                            # Copiar só a cauda do deque (de trás pra frente), sem materializar uma lista inteira
+                            buffer = self.device_buffers[device_id]
+                            count = min(len(buffer), wake_word_buffer_size)
+                            buffer_copy = np.fromiter(islice(reversed(buffer), count), dtype=np.int16, count=count)[::-1]
                         
                         if len(buffer_copy) >= self.sample_rate:  # Mínimo 1 segundo
                             self.detect_wake_word(buffer_copy, device_id)
@@ -226,10 +246,10 @@ class AudioReceiver:
     def detect_wake_word(self, audio_buffer, device_id):
         """Detectar wake word"""
         try:
-            audio_array = np.array(audio_buffer, dtype=np.int16)
+            audio_array = np.ascontiguousarray(audio_buffer, dtype=np.int16)
             
             # Verificar nível de áudio
-            audio_level = np.abs(audio_array).mean()
+            audio_level = _mean_abs_i16(audio_array)
             if audio_level < 100:
                 return
             
@@ -290,10 +310,11 @@ class AudioReceiver:
         
         # Salvar e processar
         if self.recording_state['buffer']:
-            filename = self.save_recording(device_id, duration)
+            # Converter uma única vez - usado pelo WAV e pelo reconhecimento
+            audio_array = np.array(self.recording_state['buffer'], dtype=np.int16)
+            filename = self.save_recording(device_id, duration, audio_array)
             
             # Reconhecer fala
-            audio_array = np.array(self.recording_state['buffer'], dtype=np.int16)
             text = self.recognize_speech(audio_array)
             
             if text:
@@ -309,14 +330,12 @@ class AudioReceiver:
         self.recording_state['device_id'] = None
         self.recording_state['buffer'] = []
         
-    def save_recording(self, device_id, duration):
+    def save_recording(self, device_id, duration, audio_array):
         """Salvar gravação"""
         timestamp = self.recording_state['start_time'].strftime('%Y%m%d_%H%M%S')
         device_name = "motorista" if device_id == 1 else "passageiro"
         filename = f"recordings/session_{device_name}_{timestamp}_{duration:.1f}s.wav"
         
-        audio_array = np.array(self.recording_state['buffer'], dtype=np.int16)
-        
         with wave.open(filename, 'wb') as wf:
             wf.setnchannels(self.channels)
             wf.setsampwidth(self.sample_width)
@@ -362,13 +381,23 @@ class AudioReceiver:
         return f"Você disse: {text}"
     
     def speak_response(self, text):
-        """Falar resposta"""
-        try:
-            logging.info(f"🔊 Resposta: '{text}'")
-            self.tts.say(text)
-            self.tts.runAndWait()
-        except Exception as e:
-            logging.error(f"Erro no TTS: {e}")
+        """Enfileirar resposta para a thread de TTS"""
+        logging.info(f"🔊 Resposta: '{text}'")
+        self.tts_queue.put(text)
+    
+    def tts_worker(self):
+        """Thread única de TTS - só ela acessa o engine pyttsx3"""
+        while self.running:
+            try:
+                text = self.tts_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            
+            try:
+                self.tts.say(text)
+                self.tts.runAndWait()
+            except Exception as e:
+                logging.error(f"Erro no TTS: {e}")
     
     def status_monitor(self):
         """Monitor de status"""
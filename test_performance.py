@@ -4,21 +4,304 @@ import psutil
 import subprocess
 import socket
 import struct
-import threading
+import multiprocessing
 import numpy as np
 import json
 import os
+import sys
+import math
+import random
+import ctypes
+import ctypes.util
 from datetime import datetime
 
+# orjson (opcional): serialização em C, com suporte nativo a numpy; senão json da stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Cabeçalho dos pacotes de áudio (AudioPacket packed do Arduino): sequence, timestamp, device_id,
+# sample_rate, samples_count, checksum, flags, reserved - 18 bytes, little-endian
+_HDR = struct.Struct('<IIHHHHBB')
+
+# sendmmsg(2) via ctypes (Linux): um único syscall envia um lote inteiro de datagramas
+_libc = None
+if sys.platform.startswith('linux'):
+    try:
+        _libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        _libc.sendmmsg.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int]
+        _libc.sendmmsg.restype = ctypes.c_int
+    except (OSError, AttributeError):
+        _libc = None
+
+# sendmsg (Unix) envia várias partes como um datagrama; no Windows não existe
+_HAS_SENDMSG = hasattr(socket.socket, 'sendmsg')
+
+class _iovec(ctypes.Structure):
+    _fields_ = [('iov_base', ctypes.c_void_p), ('iov_len', ctypes.c_size_t)]
+
+class _msghdr(ctypes.Structure):
+    _fields_ = [('msg_name', ctypes.c_void_p), ('msg_namelen', ctypes.c_uint32),
+                ('msg_iov', ctypes.c_void_p), ('msg_iovlen', ctypes.c_size_t),
+                ('msg_control', ctypes.c_void_p), ('msg_controllen', ctypes.c_size_t),
+                ('msg_flags', ctypes.c_int)]
+
+class _mmsghdr(ctypes.Structure):
+    _fields_ = [('msg_hdr', _msghdr), ('msg_len', ctypes.c_uint)]
+
+class _sockaddr_in(ctypes.Structure):
+    _fields_ = [('sin_family', ctypes.c_ushort), ('sin_port', ctypes.c_uint16),
+                ('sin_addr', ctypes.c_ubyte * 4), ('sin_zero', ctypes.c_ubyte * 8)]
+
+def _send_parts(sock, parts, addr):
+    """Enviar header + áudio como iovecs de um datagrama, sem concatenar (sendto onde não há sendmsg)"""
+    if _HAS_SENDMSG:
+        return sock.sendmsg(parts, [], 0, addr)
+    return sock.sendto(b''.join(parts), addr)
+
+class _SendBatch:
+    """Lote de datagramas para um destino, enviado com um sendmmsg (um envio por pacote em outros sistemas)"""
+    
+    def __init__(self, sock, addr, header_size, payload_size, slots=64):
+        self.sock = sock
+        self.addr = addr
+        self.slots = slots
+        self.count = 0
+        
+        if _libc is None:
+            self._pending = []
+            return
+        
+        # Estruturas pré-montadas: cada mensagem tem dois iovecs (header, áudio) apontando para
+        # o slot dela; por envio só se copiam as duas partes e os tamanhos
+        self._header_size = header_size
+        self._payload_size = payload_size
+        self._headers = (ctypes.c_ubyte * (header_size * slots))()
+        self._payloads = (ctypes.c_ubyte * (payload_size * slots))()
+        self._header_view = memoryview(self._headers).cast('B')
+        self._payload_view = memoryview(self._payloads).cast('B')
+        self._iov = (_iovec * (2 * slots))()
+        self._msgs = (_mmsghdr * slots)()
+        ip = socket.inet_aton(socket.gethostbyname(addr[0]))
+        self._dest = _sockaddr_in(socket.AF_INET, socket.htons(addr[1]), (ctypes.c_ubyte * 4)(*ip))
+        
+        headers_addr = ctypes.addressof(self._headers)
+        payloads_addr = ctypes.addressof(self._payloads)
+        iov_addr = ctypes.addressof(self._iov)
+        for i in range(slots):
+            self._iov[2 * i].iov_base = headers_addr + i * header_size
+            self._iov[2 * i + 1].iov_base = payloads_addr + i * payload_size
+            hdr = self._msgs[i].msg_hdr
+            hdr.msg_name = ctypes.addressof(self._dest)
+            hdr.msg_namelen = ctypes.sizeof(self._dest)
+            hdr.msg_iov = iov_addr + 2 * i * ctypes.sizeof(_iovec)
+            hdr.msg_iovlen = 2
+    
+    def add(self, header, payload):
+        """Adicionar pacote (header e áudio em bytes) ao lote; retorna quantos foram enviados (lote cheio)"""
+        if _libc is None:
+            self._pending.append((bytes(header), bytes(payload)))
+        else:
+            i = self.count
+            start = i * self._header_size
+            self._header_view[start:start + len(header)] = header
+            self._iov[2 * i].iov_len = len(header)
+            start = i * self._payload_size
+            self._payload_view[start:start + len(payload)] = payload
+            self._iov[2 * i + 1].iov_len = len(payload)
+        
+        self.count += 1
+        if self.count == self.slots:
+            return self.flush()
+        return 0
+    
+    def flush(self):
+        """Enviar os pacotes acumulados; retorna quantos foram enviados"""
+        count, self.count = self.count, 0
+        if _libc is None:
+            for parts in self._pending:
+                _send_parts(self.sock, parts, self.addr)
+            self._pending.clear()
+            return count
+        
+        sent = 0
+        fd = self.sock.fileno()
+        while sent < count:
+            n = _libc.sendmmsg(fd, ctypes.addressof(self._msgs) + sent * ctypes.sizeof(_mmsghdr), count - sent, 0)
+            if n < 0:
+                err = ctypes.get_errno()
+                raise OSError(err, os.strerror(err))
+            sent += n
+        return sent
+
+# Campos de cpu_times() que contam como CPU ocupada (os ausentes na plataforma valem 0)
+_CPU_BUSY_FIELDS = ('user', 'system', 'nice', 'irq', 'softirq', 'steal')
+_CPU_COUNT = psutil.cpu_count() or 1
+
+def _cpu_busy(times):
+    return sum(getattr(times, field, 0.0) for field in _CPU_BUSY_FIELDS)
+
+def _cpu_percent_since(last_times, last_t):
+    """Uso de CPU (média dos núcleos) desde a leitura anterior, sem bloquear como cpu_percent(interval=1)"""
+    times = psutil.cpu_times()
+    t = time.monotonic()
+    percent = 100.0 * (_cpu_busy(times) - _cpu_busy(last_times)) / ((t - last_t) * _CPU_COUNT)
+    return percent, (times, t)
+
+class _RunningStats:
+    """Média, desvio padrão e máximo incrementais (Welford) - memória O(1) em testes longos"""
+    
+    def __init__(self, reservoir=0):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.max = float('-inf')
+        # Amostra aleatória de tamanho fixo (reservoir sampling) para percentis
+        self.reservoir = reservoir
+        self.samples = []
+    
+    def update(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        if x > self.max:
+            self.max = x
+        
+        if len(self.samples) < self.reservoir:
+            self.samples.append(x)
+        elif self.reservoir:
+            j = random.randrange(self.count)
+            if j < self.reservoir:
+                self.samples[j] = x
+    
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+    
+    def percentile(self, q):
+        """Percentil estimado pela amostra do reservoir"""
+        return float(np.percentile(self.samples, q))
+
+def _agg(xs):
+    """Média e máximo de poucas amostras em Python puro (numpy só compensa para milhares)"""
+    return {'avg': sum(xs) / len(xs), 'max': max(xs)}
+
+def _json_default(obj):
+    """Escalares numpy para o json da stdlib"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Tipo não serializável: {type(obj).__name__}")
+
+def _dumps(obj, indent=False):
+    """Serializar para JSON em bytes (orjson se disponível)"""
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, indent=2 if indent else None, default=_json_default).encode()
+
+# Buffers de socket maiores que o padrão (~200 KiB), para não descartar pacotes em rajada
+_SOCK_BUFSIZE = 8 << 20
+
+def _udp_socket():
+    """Socket UDP com SO_SNDBUF/SO_RCVBUF ampliados (o kernel limita ao seu wmem_max/rmem_max)"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, _SOCK_BUFSIZE)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, _SOCK_BUFSIZE)
+    return sock
+
+def _timestamp_ms():
+    """Timestamp do header: ms de relógio truncado a uint32, como o millis() do Arduino"""
+    return (time.time_ns() // 1_000_000) & 0xFFFFFFFF
+
+def _noise_bank(rng, amplitude, size=16000):
+    """1s de ruído int16 gerado uma vez; cada pacote copia uma janela em posição aleatória"""
+    return rng.integers(-amplitude, amplitude, size, dtype=np.int16)
+
+def _sender_worker(device_id, server_addr, stop_event, counter, paced=True):
+    """Processo que simula um Arduino: socket e lote sendmmsg próprios, contagem em counter"""
+    sock = _udp_socket()
+    # Com ritmo de tempo real cada pacote sai no seu tick de 30ms; lotes grandes só sem pausa
+    batch = _SendBatch(sock, server_addr, _HDR.size, 480 * 2, slots=1 if paced else 64)
+    
+    header = bytearray(_HDR.size)
+    audio = np.empty(480, dtype=np.int16)
+    audio_bytes = memoryview(audio).cast('B')
+    rng = np.random.default_rng()
+    noise = _noise_bank(rng, 5000)
+    
+    def count(sent):
+        if sent:
+            with counter.get_lock():
+                counter.value += sent
+    
+    try:
+        seq = 0
+        next_tick = time.monotonic()
+        while not stop_event.is_set():
+            # Um timestamp por lote, compartilhado pelos pacotes dele
+            if batch.count == 0:
+                ts = _timestamp_ms()
+            _HDR.pack_into(header, 0, seq, ts, device_id, 16000, 480, 0, 0, 0)
+            start = rng.integers(len(noise) - 480)
+            np.copyto(audio, noise[start:start + 480])
+            
+            try:
+                count(batch.add(header, audio_bytes))
+            except OSError:
+                pass
+            
+            seq += 1
+            
+            # Ritmo de tempo real (480 samples a 16 kHz = 30ms por pacote), por prazo absoluto
+            # para o atraso de cada envio não se acumular
+            if paced:
+                next_tick += 0.03
+                stop_event.wait(max(0.0, next_tick - time.monotonic()))
+        
+        try:
+            count(batch.flush())
+        except OSError:
+            pass
+    except BaseException:
+        # Falha no envio encerra o teste inteiro (o monitor acorda pelo mesmo evento)
+        stop_event.set()
+        raise
+    finally:
+        sock.close()
+
 class PerformanceTester:
     def __init__(self, server_ip='127.0.0.1', server_port=8888):
         self.server_ip = server_ip
         self.server_port = server_port
+        start = datetime.now()
         self.results = {
-            'start_time': datetime.now().isoformat(),
+            'start_time': start.isoformat(),
             'tests': []
         }
         
+        # Cada resultado também vai para um JSONL assim que o teste termina
+        self.results_filename = f"performance_results_{start.strftime('%Y%m%d_%H%M%S')}.jsonl"
+        self._jsonl = open(self.results_filename, 'ab')
+        self._rng = np.random.default_rng()  # PCG64, mais rápido que o RandomState legado
+        
+        # Um socket para a verificação do servidor e todos os testes (fechado no relatório)
+        self.sock = _udp_socket()
+        self.sock.settimeout(1.0)
+        
+        # Sensor de temperatura aberto uma vez só (releitura com seek, sem open/close por amostra)
+        try:
+            self._temp_file = open('/sys/class/thermal/thermal_zone0/temp', 'r')
+        except OSError:
+            self._temp_file = None
+        
+    def record_result(self, result):
+        """Guardar resultado de um teste e gravá-lo no JSONL"""
+        self.results['tests'].append(result)
+        self._jsonl.write(_dumps(result) + b'\n')
+        self._jsonl.flush()
+    
     def test_cpu_baseline(self, duration=10):
         """Testar CPU em idle"""
         print(f"\n📊 Testando CPU baseline ({duration}s)...")
@@ -26,27 +309,34 @@ class PerformanceTester:
         cpu_samples = []
         temp_samples = []
         
-        for _ in range(duration):
-            cpu_samples.append(psutil.cpu_percent(interval=1))
+        # Amostragem a 10 Hz por deltas de cpu_times - o teste dura exatamente `duration`
+        cpu_state = (psutil.cpu_times(), time.monotonic())
+        end = cpu_state[1] + duration
+        while time.monotonic() < end:
+            time.sleep(0.1)
+            cpu, cpu_state = _cpu_percent_since(*cpu_state)
+            cpu_samples.append(cpu)
             
             try:
-                with open('/sys/class/thermal/thermal_zone0/temp', 'r') as f:
-                    temp_samples.append(int(f.read()) / 1000)
+                self._temp_file.seek(0)
+                temp_samples.append(int(self._temp_file.read()) / 1000)
             except:
                 temp_samples.append(0)
         
+        cpu = _agg(cpu_samples)
+        temp = _agg(temp_samples)
         result = {
             'test': 'cpu_baseline',
-            'cpu_avg': np.mean(cpu_samples),
-            'cpu_max': np.max(cpu_samples),
-            'temp_avg': np.mean(temp_samples),
-            'temp_max': np.max(temp_samples)
+            'cpu_avg': cpu['avg'],
+            'cpu_max': cpu['max'],
+            'temp_avg': temp['avg'],
+            'temp_max': temp['max']
         }
         
         print(f"  CPU: {result['cpu_avg']:.1f}% avg, {result['cpu_max']:.1f}% max")
         print(f"  Temp: {result['temp_avg']:.1f}°C avg, {result['temp_max']:.1f}°C max")
         
-        self.results['tests'].append(result)
+        self.record_result(result)
         return result
     
     def test_vosk_performance(self):
@@ -87,49 +377,51 @@ class PerformanceTester:
             'realtime_factor': process_time / 1.0
         }
         
-        self.results['tests'].append(result)
+        self.record_result(result)
         return result
     
     def test_udp_latency(self, num_packets=100):
         """Testar latência UDP"""
         print(f"\n📡 Testando latência UDP ({num_packets} pacotes)...")
         
-        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        sock.settimeout(1.0)
+        sock = self.sock
         
-        latencies = []
+        latencies = _RunningStats(reservoir=1000)
         lost = 0
         
-        # Header simulado
-        header_struct = struct.Struct('IIHHHHHBB')
+        # Header e áudio em buffers fixos, enviados como duas partes (sem concatenar)
+        header = bytearray(_HDR.size)
+        audio = np.empty(240, dtype=np.int16)
+        parts = (header, memoryview(audio).cast('B'))
+        rng = self._rng
+        noise = _noise_bank(rng, 1000)
         
         for i in range(num_packets):
-            # Criar pacote de teste
-            header = struct.pack('IIHHHHHBB', i, int(time.time()*1000), 1, 16000, 240, 0, 0, 0)
-            audio = np.random.randint(-1000, 1000, 240, dtype=np.int16).tobytes()
-            packet = header + audio
+            # Criar pacote de teste (envio um a um: timestamp próprio por pacote)
+            _HDR.pack_into(header, 0, i, _timestamp_ms(), 1, 16000, 240, 0, 0, 0)
+            start = rng.integers(len(noise) - 240)
+            np.copyto(audio, noise[start:start + 240])
             
-            start = time.time()
+            start = time.perf_counter_ns()
             try:
-                sock.sendto(packet, (self.server_ip, self.server_port))
+                _send_parts(sock, parts, (self.server_ip, self.server_port))
                 # Não esperamos resposta, medimos apenas envio
-                latency = (time.time() - start) * 1000
-                latencies.append(latency)
+                latency = (time.perf_counter_ns() - start) / 1e6
+                latencies.update(latency)
             except:
                 lost += 1
             
             time.sleep(0.02)  # 50 pacotes/s
         
-        sock.close()
-        
-        if latencies:
+        if latencies.count:
             result = {
                 'test': 'udp_latency',
                 'packets_sent': num_packets,
                 'packets_lost': lost,
                 'loss_rate': (lost/num_packets)*100,
-                'latency_avg': np.mean(latencies),
-                'latency_p99': np.percentile(latencies, 99)
+                'latency_avg': latencies.mean,
+                'latency_std': latencies.std,
+                'latency_p99': latencies.percentile(99)
             }
             
             print(f"  Perda: {result['loss_rate']:.1f}%")
@@ -138,82 +430,77 @@ class PerformanceTester:
             result = {'test': 'udp_latency', 'error': 'Sem conexão'}
             print("  ❌ Erro: sem conexão UDP")
         
-        self.results['tests'].append(result)
+        self.record_result(result)
         return result
     
-    def test_concurrent_load(self, duration=30):
-        """Testar carga com 2 dispositivos simultâneos"""
-        print(f"\n⚡ Testando carga simultânea ({duration}s)...")
-        
-        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        header_struct = struct.Struct('IIHHHHHBB')
+    def test_concurrent_load(self, duration=30, paced=True):
+        """Testar carga com 2 dispositivos simultâneos (paced=False envia sem pausa, saturando o servidor)"""
+        print(f"\n⚡ Testando carga simultânea ({duration}s{'' if paced else ', sem pausa'})...")
         
         stats = {
-            'packets_sent': 0,
-            'cpu_samples': [],
-            'mem_samples': []
+            'cpu': _RunningStats(),   # Estatísticas acumuladas, sem guardar amostras
+            'mem': _RunningStats()
         }
         
-        running = True
-        
-        def send_packets():
-            seq = 0
-            while running:
-                for device_id in [1, 2]:
-                    header = struct.pack('IIHHHHHBB', seq, int(time.time()*1000), 
-                                       device_id, 16000, 480, 0, 0, 0)
-                    audio = np.random.randint(-5000, 5000, 480, dtype=np.int16).tobytes()
-                    
-                    try:
-                        sock.sendto(header + audio, (self.server_ip, self.server_port))
-                        stats['packets_sent'] += 1
-                    except:
-                        pass
-                    
-                    seq += 1
-                
-                time.sleep(0.03)  # ~33 pacotes/s por dispositivo
-        
-        # Iniciar envio
-        sender = threading.Thread(target=send_packets)
-        sender.start()
-        
-        # Monitorar recursos
-        start_time = time.time()
-        while time.time() - start_time < duration:
-            stats['cpu_samples'].append(psutil.cpu_percent(interval=1))
-            stats['mem_samples'].append(psutil.virtual_memory().percent)
-        
-        running = False
-        sender.join()
-        sock.close()
+        # Iniciar envio: um processo por dispositivo (sem disputar o GIL com o monitor)
+        stop = multiprocessing.Event()
+        packets_sent = multiprocessing.Value('L', 0)
+        senders = [
+            multiprocessing.Process(target=_sender_worker,
+                                    args=(device_id, (self.server_ip, self.server_port), stop, packets_sent, paced),
+                                    daemon=True)
+            for device_id in [1, 2]
+        ]
+        for sender in senders:
+            sender.start()
+        
+        # Monitorar recursos (10 Hz, por deltas de cpu_times); o evento de parada é o relógio,
+        # então o loop termina no prazo, se um envio falhar ou se todos os envios morrerem
+        cpu_state = (psutil.cpu_times(), time.monotonic())
+        start = cpu_state[1]
+        while True:
+            stopped = stop.wait(0.1)
+            cpu, cpu_state = _cpu_percent_since(*cpu_state)
+            stats['cpu'].update(cpu)
+            stats['mem'].update(psutil.virtual_memory().percent)
+            if stopped or cpu_state[1] - start >= duration or not any(s.is_alive() for s in senders):
+                break
+        elapsed = time.monotonic() - start
+        
+        stop.set()
+        for sender in senders:
+            sender.join(timeout=5)
+            if sender.is_alive():
+                print(f"  ⚠️  Envio {sender.name} não terminou - encerrando à força")
+                sender.terminate()
+            elif sender.exitcode != 0:
+                print(f"  ⚠️  Envio {sender.name} falhou (código {sender.exitcode})")
         
         result = {
             'test': 'concurrent_load',
-            'duration': duration,
-            'packets_sent': stats['packets_sent'],
-            'packets_per_second': stats['packets_sent'] / duration,
-            'cpu_avg': np.mean(stats['cpu_samples']),
-            'cpu_max': np.max(stats['cpu_samples']),
-            'mem_avg': np.mean(stats['mem_samples']),
-            'mem_max': np.max(stats['mem_samples'])
+            'duration': elapsed,
+            'paced': paced,
+            'packets_sent': packets_sent.value,
+            'packets_per_second': packets_sent.value / elapsed,
+            'cpu_avg': stats['cpu'].mean,
+            'cpu_max': stats['cpu'].max,
+            'cpu_std': stats['cpu'].std,
+            'mem_avg': stats['mem'].mean,
+            'mem_max': stats['mem'].max,
+            'mem_std': stats['mem'].std
         }
         
         print(f"  Pacotes: {result['packets_sent']} ({result['packets_per_second']:.1f}/s)")
         print(f"  CPU: {result['cpu_avg']:.1f}% avg, {result['cpu_max']:.1f}% max")
         print(f"  MEM: {result['mem_avg']:.1f}% avg, {result['mem_max']:.1f}% max")
         
-        self.results['tests'].append(result)
+        self.record_result(result)
         return result
     
     def test_wake_word_detection(self):
         """Testar detecção de wake word"""
         print("\n🎯 Testando wake word...")
         
-        # Simular pacotes com wake word
-        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        header_struct = struct.Struct('IIHHHHHBB')
-        
         # Aqui você precisaria de um arquivo de áudio real com "motorista"
         # Por ora, simulamos
         print("  ⚠️  Teste simplificado (sem áudio real)")
@@ -224,8 +511,7 @@ class PerformanceTester:
             'note': 'Requer arquivo de áudio com wake word'
         }
         
-        self.results['tests'].append(result)
-        sock.close()
+        self.record_result(result)
         return result
     
     def generate_report(self):
@@ -243,11 +529,19 @@ class PerformanceTester:
             'python_version': subprocess.check_output(['python3', '--version']).decode().strip()
         }
         
+        if self._temp_file is not None:
+            self._temp_file.close()
+            self._temp_file = None
+        
+        self._jsonl.close()
+        self.sock.close()
+        
         filename = f"performance_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(filename, 'w') as f:
-            json.dump(self.results, f, indent=2)
+        with open(filename, 'wb') as f:
+            f.write(_dumps(self.results, indent=True))
         
         print(f"\n📄 Relatório salvo: {filename}")
+        print(f"📄 Resultados por teste: {self.results_filename}")
         
         # Resumo
         print("\n" + "="*50)
@@ -270,6 +564,7 @@ def main():
     parser.add_argument('--server-ip', default='127.0.0.1', help='IP do servidor')
     parser.add_argument('--server-port', type=int, default=8888, help='Porta do servidor')
     parser.add_argument('--quick', action='store_true', help='Testes rápidos')
+    parser.add_argument('--flood', action='store_true', help='Carga simultânea sem pausa (mede a capacidade do servidor)')
     args = parser.parse_args()
     
     print("🧪 TESTE DE PERFORMANCE - CORAL VOICE ASSISTANT")
@@ -279,21 +574,18 @@ def main():
     
     # Verificar se servidor está rodando
     print("\n⏳ Verificando servidor...")
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    sock.settimeout(1.0)
     try:
-        sock.sendto(b'test', (args.server_ip, args.server_port))
+        tester.sock.sendto(b'test', (args.server_ip, args.server_port))
         print("✅ Servidor acessível")
     except:
         print("❌ Servidor não encontrado - iniciando testes offline")
-    sock.close()
     
     # Executar testes
     tests = [
         ('cpu_baseline', lambda: tester.test_cpu_baseline(5 if args.quick else 10)),
         ('vosk_performance', tester.test_vosk_performance),
         ('udp_latency', tester.test_udp_latency),
-        ('concurrent_load', lambda: tester.test_concurrent_load(10 if args.quick else 30)),
+        ('concurrent_load', lambda: tester.test_concurrent_load(10 if args.quick else 30, paced=not args.flood)),
         ('wake_word_detection', tester.test_wake_word_detection)
     ]
     
@@ -302,7 +594,7 @@ def main():
             test_func()
         except Exception as e:
             print(f"\n❌ Erro no teste {test_name}: {e}")
-            tester.results['tests'].append({
+            tester.record_result({
                 'test': test_name,
                 'error': str(e)
             })